@@ -1,24 +1,91 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db.models.functions import Left
+from django.utils.text import Truncator
+
+from core.utils import EstimatedCountPaginator
 
 from .models import Post, Category, Location, Comment
+from .moderation import delete_by_authors, set_published
+from .search import match_expression, matching_posts, search_available
+
+ADMIN_TEXT_LENGTH = 100
+
+
+@admin.action(description='Опубликовать выбранные')
+def publish(modeladmin, request, queryset):
+    updated = set_published(queryset, True)
+    modeladmin.message_user(request, f'Опубликовано: {updated}')
+
+
+@admin.action(description='Снять выбранные с публикации')
+def unpublish(modeladmin, request, queryset):
+    updated = set_published(queryset, False)
+    modeladmin.message_user(request, f'Снято с публикации: {updated}')
+
+
+@admin.action(description='Удалить все публикации и комментарии авторов')
+def delete_authors_content(modeladmin, request, queryset):
+    author_ids = queryset.order_by().values_list(
+        'author_id', flat=True).distinct()
+    posts, comments = delete_by_authors(author_ids)
+    modeladmin.message_user(
+        request, f'Удалено публикаций: {posts}, комментариев: {comments}')
+
+
+class TextPreviewChangeList(ChangeList):
+    """Список объектов, из длинного текста которых читается начало"""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            *self.model_admin.deferred_fields
+        ).annotate(
+            text_preview=Left('text', ADMIN_TEXT_LENGTH + 1))
+
 
+class LargeTableAdmin(admin.ModelAdmin):
+    """Общие настройки админки для больших таблиц с текстом"""
 
-class PostAdmin(admin.ModelAdmin):
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    deferred_fields = ('text',)
+
+    def get_changelist(self, request, **kwargs):
+        return TextPreviewChangeList
+
+    @admin.display(description='Текст')
+    def short_text(self, obj):
+        return Truncator(obj.text_preview).chars(ADMIN_TEXT_LENGTH)
+
+
+class PostAdmin(LargeTableAdmin):
     """Модель админки страницы постов"""
 
     list_display = (
         'title',
-        'text',
+        'short_text',
         'is_published',
         'category',
         'location',
     )
+    list_select_related = (
+        'category',
+        'location',
+    )
     list_editable = (
         'is_published',
     )
     search_fields = ('title',)
     list_filter = ('category',)
     list_display_links = ('title',)
+    actions = (publish, unpublish, delete_authors_content)
+
+    def get_search_results(self, request, queryset, search_term):
+        match = match_expression(search_term)
+        if not search_available() or not match:
+            return super().get_search_results(
+                request, queryset, search_term)
+        return queryset.filter(pk__in=matching_posts(match)), False
 
 
 class CategoryAdmin(admin.ModelAdmin):
@@ -32,7 +99,9 @@ class CategoryAdmin(admin.ModelAdmin):
     list_editable = (
         'is_published',
     )
-    search_fields = ('category',)
+    # Категорий немного: поиск по ним через LIKE не нагружает базу.
+    search_fields = ('=slug', '^title')
+    actions = (publish, unpublish)
 
 
 class LocationAdmin(admin.ModelAdmin):
@@ -45,17 +114,24 @@ class LocationAdmin(admin.ModelAdmin):
     list_editable = (
         'is_published',
     )
+    actions = (publish, unpublish)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     """Модель админки страницы комментариев"""
 
     list_display = (
-        'text',
+        'short_text',
         'post',
         'author',
         'created_at',
     )
+    list_select_related = (
+        'post',
+        'author',
+    )
+    deferred_fields = ('text', 'post__text')
+    actions = (delete_authors_content,)
 
 
 admin.site.register(Post, PostAdmin)
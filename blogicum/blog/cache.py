@@ -0,0 +1,189 @@
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from core.utils import InvalidCursor, KeysetPage, KeysetPaginator
+
+from .models import Category, Location, Post
+
+User = get_user_model()
+
+TAG_VERSION_KEY = 'tag_version:{}'
+FEED_PAGE_KEY = 'feed_page:{}:{}'
+FEED_PAGE_TIMEOUT = 60 * 60
+FEED_TEMPLATE = 'includes/feed.html'
+SYNDICATION_KEY = 'syndication:{}'
+INDEX_FEED_TAG = 'feed:index'
+SCHEDULE_KEY = 'feed_schedule'
+SCHEDULE_FEED_TAG = 'feed:schedule'
+
+
+def object_tag(model, pk):
+    return f'{model._meta.model_name}:{pk}'
+
+
+def category_feed_tag(category_id):
+    return f'feed:category:{category_id}'
+
+
+def author_feed_tag(author_id):
+    return f'feed:author:{author_id}'
+
+
+def purge_tags(*tags):
+    """Делает устаревшими все записи кэша, помеченные этими тегами"""
+    cache.set_many(
+        {TAG_VERSION_KEY.format(tag): uuid4().hex for tag in tags}, None)
+
+
+def tag_versions(tags):
+    """Текущие версии тегов.
+
+    Отсутствующая в кэше версия создаётся заново, а не считается
+    нулевой, чтобы после вытеснения не отдать старую запись.
+    """
+    keys = {TAG_VERSION_KEY.format(tag): tag for tag in tags}
+    versions = cache.get_many(keys)
+    missing = keys.keys() - versions.keys()
+    if missing:
+        for key in missing:
+            cache.add(key, uuid4().hex, None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def card_tags(post):
+    """Теги объектов, которые выводит карточка публикации"""
+    tags = [
+        object_tag(Post, post.pk),
+        object_tag(User, post.author_id),
+        object_tag(Category, post.category_id),
+    ]
+    if post.location_id:
+        tags.append(object_tag(Location, post.location_id))
+    return tags
+
+
+def set_card_versions(posts):
+    """Проставляет публикациям страницы версию карточки.
+
+    Версия собирается из версий тегов публикации, автора, категории
+    и места; теги сбрасывают сигналы моделей, поэтому ключ фрагмента
+    в шаблоне меняется вместе с данными карточки.
+    """
+    posts = list(posts)
+    versions = tag_versions(
+        {tag for post in posts for tag in card_tags(post)})
+    for post in posts:
+        post.card_version = '.'.join(
+            versions.get(tag, '') for tag in card_tags(post))
+    return posts
+
+
+def _next_publication(after):
+    return Post.objects.filter(
+        is_published=True, pub_date__gt=after
+    ).order_by('pub_date').values_list('pub_date', flat=True).first()
+
+
+def release_scheduled_posts():
+    """Сбрасывает кэш лент, в которых наступила отложенная публикация.
+
+    В кэше хранится время ближайшей отложенной публикации; до него
+    закэшированные ленты не устаревают, и проверка стоит одного чтения
+    кэша. Когда время наступило, сбрасываются главная лента и ленты
+    категорий и авторов вышедших публикаций. Если запись о расписании
+    вытеснена, неизвестно, что успело выйти, поэтому сбрасываются все
+    ленты.
+    Возвращает сброшенные теги.
+    """
+    now = timezone.now()
+    schedule = cache.get(SCHEDULE_KEY)
+    if schedule is None:
+        purged = {SCHEDULE_FEED_TAG}
+    elif schedule['at'] is None or schedule['at'] > now:
+        return set()
+    else:
+        released = Post.objects.filter(
+            is_published=True,
+            pub_date__gte=schedule['at'],
+            pub_date__lte=now,
+        ).values_list('category_id', 'author_id').distinct()
+        purged = {INDEX_FEED_TAG}
+        for category_id, author_id in released:
+            purged |= {
+                category_feed_tag(category_id), author_feed_tag(author_id)}
+    purge_tags(*purged)
+    cache.set(SCHEDULE_KEY, {'at': _next_publication(now)}, None)
+    return purged
+
+
+def schedule_publication(pub_date):
+    """Учитывает новую отложенную публикацию в расписании"""
+    schedule = cache.get(SCHEDULE_KEY)
+    if schedule is None or pub_date <= timezone.now():
+        return
+    if schedule['at'] is None or pub_date < schedule['at']:
+        cache.set(SCHEDULE_KEY, {'at': pub_date}, None)
+
+
+def reset_feed_cache():
+    """Сбрасывает все ленты и расписание после вставки в обход сигналов"""
+    purge_tags(SCHEDULE_FEED_TAG)
+    cache.delete(SCHEDULE_KEY)
+
+
+def feed_page_key(feed_tag, cursor=None):
+    """Ключ записи страницы ленты: курсор в нём только хэшем"""
+    return FEED_PAGE_KEY.format(
+        feed_tag, KeysetPaginator.cursor_key(cursor))
+
+
+def cached_feed_page(feed_tag, cursor=None):
+    """Действительная запись страницы ленты в кэше или None"""
+    release_scheduled_posts()
+    entry = cache.get(feed_page_key(feed_tag, cursor))
+    if entry is not None and tag_versions(entry['tags']) == entry['tags']:
+        return entry
+    return None
+
+
+def get_feed_page(feed_tag, paginator, cursor=None):
+    """Страница ленты и её разметка, по возможности из кэша.
+
+    Запись помечена тегом ленты и тегами всех объектов на карточках;
+    она действительна, пока версии этих тегов не изменились. При
+    попадании в кэш к базе данных и шаблонам не обращаемся.
+    Курсор, который пагинатор не принимает, открывает первую страницу,
+    и она пишется под ключом первой страницы.
+    """
+    if cursor:
+        try:
+            paginator.decode_cursor(cursor)
+        except InvalidCursor:
+            cursor = None
+    key = feed_page_key(feed_tag, cursor)
+    entry = cached_feed_page(feed_tag, cursor)
+    if entry is not None:
+        page = KeysetPage(
+            entry['objects'], paginator,
+            entry['next_cursor'], entry['previous_cursor'])
+        return page, mark_safe(entry['body'])
+    versions = tag_versions([feed_tag, SCHEDULE_FEED_TAG])
+    page = paginator.get_page(cursor)
+    set_card_versions(page)
+    versions.update(
+        tag_versions({tag for post in page for tag in card_tags(post)}))
+    body = render_to_string(FEED_TEMPLATE, {'page_obj': page})
+    cache.set(key, {
+        'tags': versions,
+        'objects': page.object_list,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'body': body,
+    }, FEED_PAGE_TIMEOUT)
+    return page, mark_safe(body)
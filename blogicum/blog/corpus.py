@@ -0,0 +1,156 @@
+"""Потоковая выгрузка и загрузка публикаций блога в формате NDJSON.
+
+Каждая строка файла — одна запись в формате сериализатора Django:
+{"model": "blog.post", "pk": 1, "fields": {...}}. Связи записываются
+первичными ключами, как в dumpdata, поэтому старые фикстуры
+преобразуются в NDJSON без изменения записей.
+"""
+import datetime
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection
+
+from .models import Category, Comment, Location, Post
+
+# Порядок, в котором модели выгружаются: сначала те, на которые ссылаются.
+CORPUS_MODELS = (get_user_model(), Category, Location, Post, Comment)
+CORPUS_BATCH = 1000
+READ_CHUNK = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def _fields(model):
+    return [field for field in model._meta.concrete_fields
+            if not field.primary_key]
+
+
+def export_records(model, batch_size=CORPUS_BATCH):
+    """Строки NDJSON с записями модели.
+
+    Строки читаются из базы курсором пачками по batch_size, без
+    создания объектов моделей.
+    """
+    fields = _fields(model)
+    label = model._meta.label_lower
+    rows = model.objects.order_by('pk').values_list(
+        'pk', *(field.attname for field in fields))
+    for pk, *values in rows.iterator(chunk_size=batch_size):
+        yield json.dumps({
+            'model': label,
+            'pk': pk,
+            'fields': {
+                field.name: value for field, value in zip(fields, values)},
+        }, ensure_ascii=False, default=_json_default) + '\n'
+
+
+def read_ndjson(lines):
+    for number, line in enumerate(lines, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise ValueError(f'строка {number}: {error}') from error
+
+
+def read_json_array(stream):
+    """Записи JSON-массива, прочитанные по частям.
+
+    В памяти держится только непрочитанный хвост буфера, поэтому
+    большие фикстуры dumpdata не загружаются целиком.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = finished = False
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if buffer and not started:
+            if buffer[0] != '[':
+                raise ValueError('ожидался JSON-массив')
+            buffer = buffer[1:]
+            started = True
+            continue
+        if started and buffer.startswith(']'):
+            return
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except ValueError:
+            if finished:
+                raise ValueError('JSON-массив оборван')
+            chunk = stream.read(READ_CHUNK)
+            finished = not chunk
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        yield record
+
+
+class CorpusImporter:
+    """Загружает записи пачками многострочных INSERT.
+
+    Записи копятся по моделям и записываются пачками по batch_size,
+    поэтому память не зависит от размера файла. Связи сохраняются
+    первичными ключами как есть; проверка ссылок отложена до конца
+    загрузки, когда в базе уже есть все строки, и порядок записей в
+    файле не важен.
+    """
+
+    def __init__(self, batch_size=CORPUS_BATCH, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.models = {model._meta.label_lower: model
+                       for model in CORPUS_MODELS}
+        self.pending = {model: [] for model in CORPUS_MODELS}
+        self.totals = {model: 0 for model in CORPUS_MODELS}
+
+    def add(self, record):
+        model = self.models.get(record.get('model'))
+        if model is None:
+            return False
+        values = record['fields']
+        if 'updated_at' not in values and 'created_at' in values:
+            # Выгрузки до появления updated_at.
+            values = {**values, 'updated_at': values['created_at']}
+        obj = model(pk=record['pk'], **{
+            field.attname: field.to_python(values[field.name])
+            for field in _fields(model) if field.name in values})
+        batch = self.pending[model]
+        batch.append(obj)
+        if len(batch) >= self.batch_size:
+            self.flush(model)
+        return True
+
+    def flush(self, model):
+        batch = self.pending[model]
+        if not batch:
+            return
+        # Как bulk_create, но в режиме raw, как у loaddata: иначе поля
+        # auto_now_add получили бы время загрузки вместо сохранённого.
+        fields = model._meta.local_concrete_fields
+        step = connection.ops.bulk_batch_size(fields, batch) or len(batch)
+        for start in range(0, len(batch), step):
+            model._base_manager._insert(
+                batch[start:start + step], fields=fields, raw=True)
+        self.totals[model] += len(batch)
+        self.pending[model] = []
+        if self.progress:
+            self.progress(model, self.totals[model])
+
+    def finish(self):
+        """Дописывает остатки пачек и проверяет ссылки между строками"""
+        for model in CORPUS_MODELS:
+            self.flush(model)
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in CORPUS_MODELS])
+        sequences = connection.ops.sequence_reset_sql(
+            no_style(), CORPUS_MODELS)
+        with connection.cursor() as cursor:
+            for sql in sequences:
+                cursor.execute(sql)
+        return self.totals
@@ -0,0 +1,184 @@
+"""Ленты подписки RSS и Atom: весь сайт, категория и автор.
+
+В ленты попадают те же публикации, что и на страницы сайта по
+правилам filter_posts. Готовый XML хранится в кэше и помечен тегом
+ленты и тегами объектов её элементов, как страницы лент: он
+перестраивается, только когда в ленте появляется или из неё пропадает
+публикация, в том числе отложенная, или меняется выведенный в ней
+объект. Время изменения ленты отдаётся в Last-Modified, и повторный
+запрос с If-Modified-Since стоит чтения кэша, без запросов к базе.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+
+from core.utils import filter_posts
+
+from .cache import (
+    INDEX_FEED_TAG, SCHEDULE_FEED_TAG, SYNDICATION_KEY, author_feed_tag,
+    card_tags, category_feed_tag, object_tag, release_scheduled_posts,
+    tag_versions)
+from .models import Category, Post
+
+User = get_user_model()
+
+FEED_ITEMS = 20
+
+
+class PostsFeed(Feed):
+    """Последние публикации сайта"""
+
+    title = 'Блогикум: новые публикации'
+    description = 'Последние публикации на Блогикуме.'
+
+    def __call__(self, request, *args, **kwargs):
+        release_scheduled_posts()
+        key = SYNDICATION_KEY.format(request.build_absolute_uri(request.path))
+        entry = cache.get(key)
+        if entry is None or tag_versions(entry['tags']) != entry['tags']:
+            entry = self.render(entry, request, *args, **kwargs)
+            # Срок не нужен: устаревшую запись выдают версии тегов.
+            cache.set(key, entry, None)
+        response = HttpResponse(
+            entry['body'], content_type=entry['content_type'])
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        return get_conditional_response(
+            request, last_modified=entry['last_modified'], response=response)
+
+    def render(self, stale, request, *args, **kwargs):
+        """Запись кэша с XML ленты.
+
+        Время изменения берётся из устаревшей записи stale, если XML не
+        изменился, чтобы клиенты не скачивали ленту заново.
+        """
+        try:
+            obj = self.get_object(request, *args, **kwargs)
+        except ObjectDoesNotExist:
+            raise Http404('Лента не найдена.')
+        versions = tag_versions([*self.feed_tags(obj), SCHEDULE_FEED_TAG])
+        feedgen = self.get_feed(obj, request)
+        versions.update(tag_versions(
+            {tag for item in feedgen.items for tag in item['cache_tags']}))
+        body = feedgen.writeString('utf-8')
+        last_modified = int(time.time())
+        if stale is not None and stale['body'] == body:
+            last_modified = stale['last_modified']
+        elif stale is not None:
+            # Last-Modified точен до секунды: изменение в ту же секунду
+            # всё равно должно сдвинуть время.
+            last_modified = max(last_modified, stale['last_modified'] + 1)
+        return {
+            'tags': versions,
+            'body': body,
+            'content_type': feedgen.content_type,
+            'last_modified': last_modified,
+        }
+
+    def feed_tags(self, obj):
+        return [INDEX_FEED_TAG]
+
+    def link(self):
+        return reverse('blog:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return filter_posts(self.posts(obj)).select_related(
+            'author', 'category')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return (item.category.title,)
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        # Отложенная публикация могла быть изменена до выхода.
+        return max(item.pub_date, item.updated_at)
+
+    def item_extra_kwargs(self, item):
+        # Генераторы лент не выводят лишние поля элементов.
+        return {'cache_tags': card_tags(item)}
+
+
+class CategoryPostsFeed(PostsFeed):
+    """Последние публикации категории"""
+
+    def get_object(self, request, category_slug):
+        return get_object_or_404(
+            Category, is_published=True, slug=category_slug)
+
+    def feed_tags(self, obj):
+        return [category_feed_tag(obj.pk), object_tag(Category, obj.pk)]
+
+    def title(self, obj):
+        return f'Блогикум: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=(obj.slug,))
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(PostsFeed):
+    """Последние публикации автора"""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def feed_tags(self, obj):
+        return [author_feed_tag(obj.pk), object_tag(User, obj.pk)]
+
+    def title(self, obj):
+        return f'Блогикум: публикации {obj.username}'
+
+    def description(self, obj):
+        return f'Последние публикации пользователя {obj.username}.'
+
+    def link(self, obj):
+        return reverse('blog:profile', args=(obj.username,))
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class AtomPostsFeed(AtomFeedMixin, PostsFeed):
+    pass
+
+
+class AtomCategoryPostsFeed(AtomFeedMixin, CategoryPostsFeed):
+    pass
+
+
+class AtomAuthorPostsFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
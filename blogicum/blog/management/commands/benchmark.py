@@ -0,0 +1,189 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from blog.models import Category, Comment, Post
+from core.db import observe_queries
+from core.utils import filter_posts
+from core.work_queue import work_queue
+
+User = get_user_model()
+
+PERCENTILES = (50, 95, 99)
+BENCHMARK_COMMENT = 'Комментарий для замера'
+
+
+def percentiles(samples):
+    """p50, p95 и p99 выборки в миллисекундах"""
+    if len(samples) == 1:
+        return dict.fromkeys(PERCENTILES, samples[0] * 1000)
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {p: cuts[p - 1] * 1000 for p in PERCENTILES}
+
+
+class QueryCounter:
+    """Счётчик запросов к базе, не зависящий от DEBUG и reset_queries"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def scenarios():
+    """Запросы замеров: имя, метод, адрес и данные формы"""
+    post = filter_posts(Post.objects).order_by('-comment_count').first()
+    category = Category.objects.filter(
+        is_published=True).annotate(total=Count('posts')).order_by(
+        '-total').first()
+    author = User.objects.annotate(total=Count('posts')).order_by(
+        '-total').first()
+    if post is None or category is None or author is None:
+        raise CommandError(
+            'В базе нет данных для замеров; запустите seed_benchmark.')
+    return author, (
+        ('index', 'get', reverse('blog:index'), None),
+        ('category_posts', 'get',
+         reverse('blog:category_posts', args=[category.slug]), None),
+        ('post_detail', 'get',
+         reverse('blog:post_detail', args=[post.pk]), None),
+        ('profile', 'get',
+         reverse('blog:profile', args=[author.username]), None),
+        ('add_comment', 'post',
+         reverse('blog:add_comment', args=[post.pk]),
+         {'text': BENCHMARK_COMMENT}),
+    )
+
+
+class Command(BaseCommand):
+    help = ('Замеряет ленты, страницу публикации, профиль и добавление'
+            ' комментария через тестовый клиент Django: задержку (p50,'
+            ' p95, p99), число запросов к базе и выделенную память.'
+            ' Запросы идут без общей транзакции, как на сервере, а'
+            ' созданные комментарии удаляются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=200,
+            help='Сколько раз выполнять каждый запрос.')
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Сколько запросов выполнить до замера.')
+        parser.add_argument(
+            '--cold-cache', action='store_true',
+            help='Очищать кэш перед каждым запросом.')
+        parser.add_argument(
+            '--output', help='Сохранить результаты в файл JSON.')
+        parser.add_argument(
+            '--baseline',
+            help='Файл JSON с прошлыми результатами для сравнения.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 относительно базового замера.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('Нужна хотя бы одна итерация.')
+        # Без общей транзакции: иначе чтение шло бы через соединение
+        # записи, а эффекты после фиксации не выполнялись бы вовсе.
+        last_comment = Comment.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        try:
+            with override_settings(DEBUG=False):
+                results = self.run(options)
+        finally:
+            self.clean_up(last_comment)
+        report = {
+            'iterations': options['iterations'],
+            'cold_cache': options['cold_cache'],
+            'posts': Post.objects.count(),
+            'scenarios': results,
+        }
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name}: p50 {result["p50_ms"]:.1f} мс,'
+                f' p95 {result["p95_ms"]:.1f} мс,'
+                f' p99 {result["p99_ms"]:.1f} мс,'
+                f' запросов {result["queries"]},'
+                f' память {result["peak_kib"]:.0f} КиБ')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def run(self, options):
+        author, requests = scenarios()
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(author)
+        results = {}
+        for name, method, url, data in requests:
+            def request():
+                if options['cold_cache']:
+                    cache.clear()
+                return getattr(client, method)(url, data)
+
+            for _ in range(options['warmup']):
+                request()
+            samples = []
+            for _ in range(options['iterations']):
+                queries = QueryCounter()
+                with observe_queries(queries):
+                    start = time.perf_counter()
+                    response = request()
+                    samples.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f'{name}: ответ {response.status_code}')
+            tracemalloc.start()
+            request()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = {
+                **{f'p{p}_ms': value
+                   for p, value in percentiles(samples).items()},
+                'mean_ms': statistics.fmean(samples) * 1000,
+                'queries': queries.count,
+                'peak_kib': peak / 1024,
+            }
+        client.logout()
+        return results
+
+    @staticmethod
+    def clean_up(last_comment):
+        """Удаляет комментарии замера обычным путём, с сигналами"""
+        work_queue.flush()
+        Comment.objects.filter(
+            pk__gt=last_comment, text=BENCHMARK_COMMENT).delete()
+        work_queue.flush()
+
+    def compare(self, results, path, tolerance):
+        """Сравнивает p95 и число запросов с базовым замером"""
+        with open(path, encoding='utf-8') as source:
+            baseline = json.load(source)['scenarios']
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            change = result['p95_ms'] / before['p95_ms'] - 1
+            self.stdout.write(
+                f'{name}: p95 {change:+.0%},'
+                f' запросов {before["queries"]} → {result["queries"]}')
+            if change > tolerance or result['queries'] > before['queries']:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(
+                'Замедлились по сравнению с базовым замером: '
+                + ', '.join(regressions))
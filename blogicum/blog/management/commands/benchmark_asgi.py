@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from blogicum.asgi import application
+
+from .benchmark import percentiles, scenarios
+from .benchmark_startup import wsgi_get
+
+INTERFACES = ('wsgi', 'asgi')
+
+
+async def asgi_get(app, path, cookie):
+    """GET-запрос к приложению ASGI, как от сервера; возвращает статус"""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    statuses = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await app(scope, receive, send)
+    return statuses[0]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность при множестве одновременных'
+            ' соединений: WSGI-обработчик с потоком на соединение и'
+            ' приложение ASGI из blogicum.asgi, в котором публикация,'
+            ' лента категории и профиль — асинхронные представления.'
+            ' Запросы идут внутри процесса, без сетевого сервера. Запускайте'
+            ' в профиле production: в development панель отладки делает'
+            ' каждый ответ в разы дороже.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=200,
+            help='Сколько соединений шлют запросы одновременно.')
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='Сколько раз запрашивать каждую страницу.')
+        parser.add_argument(
+            '--interfaces', nargs='+', default=INTERFACES,
+            choices=INTERFACES)
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('Нужны хотя бы одно соединение и один запрос.')
+        author, pages = scenarios()
+        client = Client()
+        client.force_login(author)
+        cookie = f'{settings.SESSION_COOKIE_NAME}=' + client.cookies[
+            settings.SESSION_COOKIE_NAME].value
+        for name, method, path, _ in pages:
+            if method != 'get':
+                continue
+            self.stdout.write(f'{name}:')
+            for interface in options['interfaces']:
+                run = getattr(self, f'run_{interface}')
+                samples, elapsed = run(
+                    path, cookie, options['concurrency'],
+                    options['requests'])
+                result = percentiles(samples)
+                self.stdout.write(
+                    f'  {interface}: {len(samples) / elapsed:.0f} ответов/с,'
+                    f' p50 {result[50]:.1f} мс, p95 {result[95]:.1f} мс,'
+                    f' p99 {result[99]:.1f} мс')
+
+    @staticmethod
+    def check_status(path, status):
+        if status != 200:
+            raise CommandError(f'{path}: ответ {status}')
+
+    def run_wsgi(self, path, cookie, concurrency, requests):
+        handler = WSGIHandler()
+        remaining = iter(range(requests))
+        lock = threading.Lock()
+        samples = []
+
+        def connection():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                start = time.perf_counter()
+                status = wsgi_get(handler, path, cookie)
+                samples.append(time.perf_counter() - start)
+                self.check_status(path, int(status.split()[0]))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(connection)
+                           for _ in range(concurrency)]:
+                future.result()
+        return samples, time.perf_counter() - start
+
+    def run_asgi(self, path, cookie, concurrency, requests):
+        remaining = iter(range(requests))
+        samples = []
+
+        async def connection():
+            for _ in remaining:
+                start = time.perf_counter()
+                status = await asgi_get(application, path, cookie)
+                samples.append(time.perf_counter() - start)
+                self.check_status(path, status)
+
+        async def run():
+            start = time.perf_counter()
+            await asyncio.gather(*(connection() for _ in range(concurrency)))
+            return time.perf_counter() - start
+
+        return samples, asyncio.run(run())
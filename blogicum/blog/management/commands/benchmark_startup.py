@@ -0,0 +1,122 @@
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from .benchmark import percentiles, scenarios
+
+PROFILES = ('development', 'production')
+
+
+def wsgi_get(handler, path, cookie):
+    """GET-запрос к WSGI-обработчику, как от сервера; возвращает статус"""
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': cookie,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+    response = handler(
+        environ, lambda status, headers: statuses.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        # Как на сервере: закрытие ответа шлёт request_finished, и
+        # без CONN_MAX_AGE соединение с базой закрывается.
+        response.close()
+    return statuses[0]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время ответа в профилях настроек BLOGICUM_ENV.'
+            ' Каждый профиль запускается в отдельном процессе, запросы'
+            ' проходят через WSGI-обработчик, как на сервере, — вместе'
+            ' с открытием соединений с базой и загрузкой шаблонов.'
+            ' Замеряется первый ответ после запуска и установившийся'
+            ' режим. Учтите, что профиль production переводит файл'
+            ' SQLite в режим WAL.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', nargs='+', default=PROFILES, choices=PROFILES)
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Сколько раз запрашивать каждую страницу.')
+        parser.add_argument(
+            '--child', action='store_true', help='Служебный режим.')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            json.dump(self.measure(options['requests']), self.stdout)
+            return
+        results = {
+            profile: self.run_profile(profile, options['requests'])
+            for profile in options['profiles']}
+        for name in next(iter(results.values())):
+            self.stdout.write(f'{name}:')
+            for profile, result in results.items():
+                result = result[name]
+                self.stdout.write(
+                    f'  {profile}: первый ответ {result["first_ms"]:.1f} мс,'
+                    f' p50 {result["p50_ms"]:.1f} мс,'
+                    f' p95 {result["p95_ms"]:.1f} мс')
+
+    def run_profile(self, profile, requests):
+        env = {**os.environ, 'BLOGICUM_ENV': profile,
+               'DJANGO_SETTINGS_MODULE': 'blogicum.settings'}
+        env.setdefault('DJANGO_SECRET_KEY', 'benchmark-startup')
+        process = subprocess.run(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'),
+             'benchmark_startup', '--child', '--requests', str(requests)],
+            env=env, capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError(f'{profile}: {process.stderr.strip()}')
+        return json.loads(process.stdout)
+
+    def measure(self, requests):
+        author, pages = scenarios()
+        client = Client()
+        client.force_login(author)
+        cookie = f'{settings.SESSION_COOKIE_NAME}=' + client.cookies[
+            settings.SESSION_COOKIE_NAME].value
+        handler = WSGIHandler()
+        results = {}
+        for name, method, path, _ in pages:
+            if method != 'get':
+                continue
+            samples = []
+            for _ in range(requests + 1):
+                start = time.perf_counter()
+                status = wsgi_get(handler, path, cookie)
+                samples.append(time.perf_counter() - start)
+                if not status.startswith('200'):
+                    raise CommandError(f'{path}: ответ {status}')
+            first, *rest = samples
+            results[name] = {
+                'first_ms': first * 1000,
+                'mean_ms': statistics.fmean(rest) * 1000,
+                **{f'p{p}_ms': value
+                   for p, value in percentiles(rest).items()},
+            }
+        return results
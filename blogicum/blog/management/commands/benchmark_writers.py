@@ -0,0 +1,118 @@
+import io
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, router, transaction
+from django.db.models import F
+
+from blog.models import Comment, Post
+
+from .benchmark import percentiles
+
+BENCHMARK_TEXT = 'benchmark_writers'
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет конкурентную запись: несколько процессов'
+            ' одновременно добавляют комментарии так же, как'
+            ' add_comment, — в транзакции, которая сначала читает'
+            ' публикацию, а потом пишет. Сравнивает режимы начала'
+            ' транзакций: число ошибок «database is locked», пропускную'
+            ' способность и задержку. Созданные комментарии удаляются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--writers', type=int, default=8,
+            help='Сколько процессов пишут одновременно.')
+        parser.add_argument(
+            '--transactions', type=int, default=50,
+            help='Сколько транзакций выполняет каждый процесс.')
+        parser.add_argument(
+            '--modes', nargs='+', default=TRANSACTION_MODES,
+            choices=TRANSACTION_MODES)
+        parser.add_argument('--child', help='Служебный режим.')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            json.dump(self.write(options['child'], options['transactions']),
+                      self.stdout)
+            return
+        if not Post.objects.exists():
+            raise CommandError(
+                'В базе нет публикаций; запустите seed_benchmark.')
+        try:
+            for mode in options['modes']:
+                self.report(mode, self.run_writers(mode, options))
+        finally:
+            comments = Comment.objects.filter(text=BENCHMARK_TEXT)
+            comments._raw_delete(router.db_for_write(Comment))
+            call_command('recount_comments', stdout=io.StringIO())
+
+    def run_writers(self, mode, options):
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'),
+            'benchmark_writers', '--child', mode,
+            '--transactions', str(options['transactions'])]
+        start = time.perf_counter()
+        processes = [
+            subprocess.Popen(command, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, text=True)
+            for _ in range(options['writers'])]
+        results = []
+        for process in processes:
+            stdout, stderr = process.communicate()
+            if process.returncode:
+                raise CommandError(stderr.strip())
+            results.append(json.loads(stdout))
+        elapsed = time.perf_counter() - start
+        samples = [
+            sample for result in results for sample in result['samples']]
+        return {
+            'committed': len(samples),
+            'locked': sum(result['locked'] for result in results),
+            'per_second': len(samples) / elapsed,
+            **(percentiles(samples) if samples else {}),
+        }
+
+    def report(self, mode, result):
+        line = (f'{mode}: записано {result["committed"]},'
+                f' «database is locked» {result["locked"]},'
+                f' {result["per_second"]:.0f} транзакций/с')
+        if result['committed']:
+            line += (f', p50 {result[50]:.1f} мс, p95 {result[95]:.1f} мс,'
+                     f' p99 {result[99]:.1f} мс')
+        self.stdout.write(line)
+
+    @staticmethod
+    def write(mode, transactions):
+        connections['default'].settings_dict['OPTIONS'][
+            'transaction_mode'] = mode
+        post_ids = list(Post.objects.values_list('pk', flat=True)[:100])
+        author_id = Post.objects.values_list('author_id', flat=True)[0]
+        samples = []
+        locked = 0
+        for number in range(transactions):
+            post_id = post_ids[number % len(post_ids)]
+            start = time.perf_counter()
+            try:
+                # Без сигналов модели: счётчик обновляется в той же
+                # транзакции, фоновая очередь в замер не попадает.
+                with transaction.atomic():
+                    post = Post.objects.get(pk=post_id)
+                    Comment.objects.bulk_create([Comment(
+                        post=post, author_id=author_id, text=BENCHMARK_TEXT)])
+                    Post.objects.filter(pk=post_id).update(
+                        comment_count=F('comment_count') + 1)
+            except OperationalError as error:
+                if 'locked' not in str(error):
+                    raise
+                locked += 1
+                continue
+            samples.append(time.perf_counter() - start)
+        return {'samples': samples, 'locked': locked}
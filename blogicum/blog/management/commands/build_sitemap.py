@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.sitemaps import SITEMAP_ITERATOR_CHUNK, build_sitemap
+
+
+class Command(BaseCommand):
+    help = ('Собирает карту сайта: сжатые файлы по 50 000 адресов и'
+            ' индекс sitemap.xml в SITEMAP_ROOT. Заново пишутся только'
+            ' файлы, строки которых изменились с прошлой сборки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--site-url',
+            help='Адрес сайта для ссылок; по умолчанию SITE_URL.')
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Записать заново все файлы, например после смены имён'
+                 ' пользователей.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=SITEMAP_ITERATOR_CHUNK,
+            help='Сколько строк читать из базы за раз.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        start = time.perf_counter()
+        written, removed, kept = build_sitemap(
+            options['site_url'], options['full'], options['chunk_size'])
+        self.stdout.write(
+            f'Файлов карты сайта записано: {written}, удалено: {removed},'
+            f' без изменений: {kept}, за {time.perf_counter() - start:.1f} с')
@@ -0,0 +1,38 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.corpus import CORPUS_MODELS, read_json_array
+
+
+class Command(BaseCommand):
+    help = ('Преобразует фикстуру dumpdata (например, db.json) в NDJSON'
+            ' для import_blog, не загружая её в память целиком. Записи'
+            ' других моделей отбрасываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='JSON-фикстура dumpdata.')
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл NDJSON; по умолчанию — стандартный вывод.')
+
+    def handle(self, *args, **options):
+        labels = {model._meta.label_lower for model in CORPUS_MODELS}
+        path = options['path']
+        output = (sys.stdout if path == '-'
+                  else open(path, 'w', encoding='utf-8'))
+        converted = 0
+        try:
+            with open(options['fixture'], encoding='utf-8') as fixture:
+                for record in read_json_array(fixture):
+                    if record.get('model') in labels:
+                        output.write(json.dumps(
+                            record, ensure_ascii=False) + '\n')
+                        converted += 1
+        except ValueError as error:
+            raise CommandError(f'Не удалось разобрать фикстуру: {error}')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(f'Преобразовано записей: {converted}')
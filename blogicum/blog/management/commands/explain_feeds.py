@@ -0,0 +1,64 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from blog.models import Post
+from blog.views import PAGINATE_STEP
+from core.utils import filter_posts, paginate, select_post_cards
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?(?P<table>\w+)\b(?! USING)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (ORDER|GROUP) BY')
+
+
+def feed_querysets():
+    """Выборки лент в том виде, в котором их строят представления"""
+    own_posts = Post.objects.filter(author_id=0).order_by('-pub_date')
+    feeds = {
+        'index': filter_posts(Post.objects),
+        'category': filter_posts(Post.objects.filter(category_id=0)),
+        'profile': filter_posts(own_posts),
+        'own_profile': own_posts,
+    }
+    cursor = [timezone.now(), 0]
+    for name, queryset in feeds.items():
+        paginator = paginate(select_post_cards(queryset), PAGINATE_STEP)
+        yield f'{name}: first page', paginator.get_queryset()
+        yield f'{name}: next page', paginator.get_queryset(cursor)
+        yield f'{name}: previous page', paginator.get_queryset(
+            cursor, backwards=True)
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN для запросов лент публикаций и завершается'
+            ' с ошибкой, если какой-то из них читает таблицу публикаций'
+            ' целиком или сортирует её.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plan', action='store_true',
+            help='Печатать план каждого запроса.')
+
+    def handle(self, *args, **options):
+        table = Post._meta.db_table
+        failures = []
+        for name, queryset in feed_querysets():
+            plan = queryset.explain()
+            if options['verbose_plan']:
+                self.stdout.write(f'{name}\n{plan}\n')
+            problems = [
+                line.strip() for line in plan.splitlines()
+                if TEMP_SORT.search(line) or any(
+                    match.group('table') == table
+                    for match in FULL_SCAN.finditer(line))
+            ]
+            if problems:
+                failures.append(f'{name}: {"; ".join(problems)}')
+            else:
+                self.stdout.write(f'{name}: OK')
+        if failures:
+            raise CommandError(
+                'Полный просмотр или сортировка в запросах лент:\n'
+                + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Все запросы лент используют'
+                                             ' индексы.'))
@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from blog.corpus import CORPUS_BATCH, CORPUS_MODELS, export_records
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, категории, места, публикации и'
+            ' комментарии в файл NDJSON, читая базу пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки; по умолчанию — стандартный вывод.')
+        parser.add_argument(
+            '--batch-size', type=int, default=CORPUS_BATCH,
+            help='Сколько строк читать из базы за один раз.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        output = (sys.stdout if path == '-'
+                  else open(path, 'w', encoding='utf-8'))
+        try:
+            for model in CORPUS_MODELS:
+                total = 0
+                for line in export_records(model, options['batch_size']):
+                    output.write(line)
+                    total += 1
+                self.stderr.write(
+                    f'{model._meta.verbose_name_plural}: {total}')
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from blog.models import Post
+from blog.thumbnails import (
+    THUMBNAIL_RETRY_TIMEOUT, THUMBNAIL_WORKERS, generate_thumbnails,
+    purge_image_posts, remember_thumbnails)
+
+
+class Command(BaseCommand):
+    help = ('Создаёт недостающие уменьшенные копии изображений'
+            ' публикаций в несколько потоков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=THUMBNAIL_WORKERS,
+            help='Сколько изображений обрабатывать одновременно.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Создать заново и уже готовые копии.')
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True).distinct()
+        start = time.perf_counter()
+        generated = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = pool.map(
+                lambda name: self.generate(name, options['force']),
+                names.iterator())
+            for name, created in results:
+                if created is None:
+                    failed += 1
+                elif created:
+                    generated.append(name)
+        purge_image_posts(generated)
+        self.stdout.write(
+            f'Обработано изображений: {len(generated)},'
+            f' ошибок: {failed}, за {time.perf_counter() - start:.1f} с')
+
+    def generate(self, name, force):
+        try:
+            return name, generate_thumbnails(name, force)
+        except (OSError, Image.DecompressionBombError) as error:
+            self.stderr.write(f'{name}: {error}')
+            remember_thumbnails(name, THUMBNAIL_RETRY_TIMEOUT)
+            return name, None
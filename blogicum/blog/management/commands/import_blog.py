@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+
+from blog.cache import reset_feed_cache
+from blog.corpus import CORPUS_BATCH, CorpusImporter, read_ndjson
+
+
+class Command(BaseCommand):
+    help = ('Загружает файл NDJSON, выгруженный export_blog, пачками'
+            ' строк. Первичные ключи и связи сохраняются как в файле.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для загрузки; по умолчанию — стандартный ввод.')
+        parser.add_argument(
+            '--batch-size', type=int, default=CORPUS_BATCH,
+            help='Сколько строк одной модели вставлять за один запрос.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        source = (sys.stdin if path == '-'
+                  else open(path, encoding='utf-8'))
+        importer = CorpusImporter(options['batch_size'], self.progress)
+        try:
+            with transaction.atomic(), \
+                    connection.constraint_checks_disabled():
+                skipped = 0
+                for record in read_ndjson(source):
+                    skipped += not importer.add(record)
+                importer.finish()
+        except (ValueError, KeyError, IntegrityError) as error:
+            raise CommandError(f'Загрузка отменена: {error}')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        if skipped:
+            self.stdout.write(f'Пропущено записей других моделей: {skipped}')
+        # Строки вставлены без сигналов моделей: счётчики, поисковый
+        # индекс и кэш лент приводятся в порядок отдельно.
+        call_command('recount_comments', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        reset_feed_cache()
+
+    def progress(self, model, total):
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {total}')
@@ -0,0 +1,56 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.cache import (
+    INDEX_FEED_TAG, SCHEDULE_FEED_TAG, SCHEDULE_KEY, category_feed_tag,
+    get_feed_page, release_scheduled_posts)
+from blog.models import Category, Post
+from blog.views import PAGINATE_STEP
+from core.utils import filter_posts, paginate, select_post_cards
+
+
+class Command(BaseCommand):
+    help = ('Сбрасывает кэш лент, в которых вышли отложенные публикации,'
+            ' и заново заполняет первые страницы этих лент.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Работать постоянно, просыпаясь к ближайшей публикации.')
+        parser.add_argument(
+            '--max-sleep', type=int, default=60,
+            help='Наибольшая пауза между проверками в режиме --watch, с.')
+
+    def handle(self, *args, **options):
+        while True:
+            self.release()
+            if not options['watch']:
+                return
+            time.sleep(self.seconds_to_next(options['max_sleep']))
+
+    def release(self):
+        purged = release_scheduled_posts()
+        if not purged:
+            return
+        feeds = []
+        if purged & {INDEX_FEED_TAG, SCHEDULE_FEED_TAG}:
+            feeds.append((INDEX_FEED_TAG, filter_posts(Post.objects)))
+        for category in Category.objects.filter(is_published=True):
+            tag = category_feed_tag(category.pk)
+            if purged & {tag, SCHEDULE_FEED_TAG}:
+                feeds.append((tag, filter_posts(category.posts)))
+        for tag, queryset in feeds:
+            get_feed_page(
+                tag, paginate(select_post_cards(queryset), PAGINATE_STEP))
+        self.stdout.write(f'Обновлено лент: {len(feeds)}')
+
+    @staticmethod
+    def seconds_to_next(max_sleep):
+        schedule = cache.get(SCHEDULE_KEY) or {}
+        if schedule.get('at') is None:
+            return max_sleep
+        delay = (schedule['at'] - timezone.now()).total_seconds()
+        return min(max(delay, 0), max_sleep)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Comment, Post
+from blog.search import (
+    clear_index, index_comments, index_posts, search_available)
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс публикаций и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько объектов индексировать за один проход.')
+
+    def handle(self, *args, **options):
+        if not search_available():
+            raise CommandError('Поиск работает только с SQLite (FTS5).')
+        clear_index()
+        for model, index in ((Post, index_posts), (Comment, index_comments)):
+            total = 0
+            last_pk = 0
+            while True:
+                batch = list(
+                    model.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', flat=True)[:options['batch_size']])
+                if not batch:
+                    break
+                index(batch)
+                total += len(batch)
+                last_pk = batch[-1]
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {total}')
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.cache import object_tag, purge_tags
+from blog.models import Comment, Post
+
+
+def actual_comment_count():
+    """Подзапрос с фактическим числом комментариев публикации"""
+    counts = Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+        'post').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает разошедшиеся счётчики комментариев публикаций'
+            ' пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько публикаций проверять за один запрос.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать число разошедшихся счётчиков.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            drifted = Post.objects.filter(pk__in=batch).alias(
+                actual=actual_comment_count()).exclude(
+                comment_count=F('actual'))
+            drifted_pks = list(drifted.values_list('pk', flat=True))
+            fixed += len(drifted_pks)
+            if drifted_pks and not options['dry_run']:
+                Post.objects.filter(pk__in=drifted_pks).update(
+                    comment_count=actual_comment_count())
+                purge_tags(*(object_tag(Post, pk) for pk in drifted_pks))
+        action = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(f'{action} счётчиков: {fixed}')
@@ -0,0 +1,125 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from blog.cache import reset_feed_cache
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+BENCHMARK_PREFIX = 'bench'
+BENCHMARK_PASSWORD = 'bench-password'
+WORDS = (
+    'утро', 'город', 'дорога', 'море', 'книга', 'письмо', 'дом', 'сад',
+    'река', 'поезд', 'встреча', 'вечер', 'друг', 'работа', 'погода',
+    'музыка', 'лес', 'гора', 'чай', 'прогулка', 'новость', 'зима',
+    'лето', 'окно', 'история', 'кошка', 'обед', 'дождь', 'площадь',
+)
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными для нагрузочных'
+            ' замеров: пользователями, категориями, местами, публикациями'
+            ' (часть — отложенные) и комментариями. Строки вставляются'
+            ' пачками через bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--locations', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--scheduled', type=float, default=0.05,
+            help='Доля публикаций с датой публикации в будущем.')
+        parser.add_argument(
+            '--unpublished', type=float, default=0.05,
+            help='Доля публикаций, снятых с публикации.')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(
+                username__startswith=f'{BENCHMARK_PREFIX}_').exists():
+            raise CommandError(
+                'Данные для замеров уже созданы; начните с пустой базы.')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        password = make_password(BENCHMARK_PASSWORD)
+        users = self.create(User, (
+            User(username=f'{BENCHMARK_PREFIX}_{number}', password=password)
+            for number in range(options['users'])))
+        categories = self.create(Category, (
+            Category(title=self.sentence(2), description=self.sentence(12),
+                     slug=f'{BENCHMARK_PREFIX}-{number}')
+            for number in range(options['categories'])))
+        locations = self.create(Location, (
+            Location(name=self.sentence(2))
+            for _ in range(options['locations'])))
+        posts = self.create(Post, (
+            self.post(users, categories, locations, options)
+            for _ in range(options['posts'])))
+        self.create(Comment, (
+            Comment(text=self.sentence(15),
+                    post_id=self.random.choice(posts),
+                    author_id=self.random.choice(users))
+            for _ in range(options['comments'])))
+
+        # bulk_create не вызывает сигналы моделей: счётчики, поисковый
+        # индекс и кэш лент приводятся в порядок, как после import_blog.
+        call_command('recount_comments', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        reset_feed_cache()
+
+    def create(self, model, objects):
+        """Вставляет объекты пачками и возвращает их первичные ключи"""
+        pks = []
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                pks += self.insert(model, batch)
+                batch = []
+        pks += self.insert(model, batch)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {len(pks)}')
+        return pks
+
+    @staticmethod
+    def insert(model, batch):
+        if not batch:
+            return []
+        model.objects.bulk_create(batch)
+        if batch[0].pk is not None:
+            return [obj.pk for obj in batch]
+        # Бэкенд не вернул ключи — берём последние вставленные строки.
+        return list(model.objects.order_by('-pk').values_list(
+            'pk', flat=True)[:len(batch)])[::-1]
+
+    def sentence(self, length):
+        return ' '.join(self.random.choices(WORDS, k=length)).capitalize()
+
+    def post(self, users, categories, locations, options):
+        scheduled = self.random.random() < options['scheduled']
+        shift = timedelta(minutes=self.random.randint(1, 60 * 24 * 365))
+        return Post(
+            title=self.sentence(4),
+            text='\n\n'.join(
+                self.sentence(self.random.randint(20, 60))
+                for _ in range(self.random.randint(1, 5))),
+            pub_date=self.now + shift if scheduled else self.now - shift,
+            is_published=self.random.random() >= options['unpublished'],
+            author_id=self.random.choice(users),
+            category_id=self.random.choice(categories),
+            location_id=(self.random.choice(locations)
+                         if locations and self.random.random() < 0.7
+                         else None),
+        )
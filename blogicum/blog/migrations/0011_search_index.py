@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Вес совпадения в заголовке относительно совпадения в тексте.
+TITLE_WEIGHT = 10.0
+
+
+# Миграция только создаёт таблицу индекса. Индекс заполняет команда
+# rebuild_search_index текущим стеммером core.search; на базе с
+# публикациями её нужно выполнить после миграции, дальше индекс
+# обновляют сигналы.
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE blog_search USING fts5('
+        'title, body, post_id UNINDEXED,'
+        " tokenize='unicode61 remove_diacritics 0')"
+    )
+    schema_editor.execute(
+        "INSERT INTO blog_search (blog_search, rank)"
+        f" VALUES ('rank', 'bm25({TITLE_WEIGHT}, 1.0)')"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE blog_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
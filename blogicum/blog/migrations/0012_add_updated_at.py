@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_search_index'),
+    ]
+
+    # Сначала без NOT NULL и индекса: значения заполняет 0013.
+    operations = [
+        migrations.AddField(
+            model_name=model_name,
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True, verbose_name='Изменено'),
+        )
+        for model_name in ('category', 'comment', 'location', 'post')
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations, models, transaction
+from django.db.models import F
+
+BACKFILL_BATCH = 5000
+MODEL_NAMES = ('category', 'comment', 'location', 'post')
+
+
+def fill_updated_at(apps, schema_editor):
+    """Заполняет updated_at значением created_at диапазонами ключей.
+
+    Каждый диапазон — отдельная короткая транзакция, поэтому большие
+    таблицы не блокируются на всё время заполнения.
+    """
+    for model_name in MODEL_NAMES:
+        model = apps.get_model('blog', model_name)
+        rows = model.objects.using(schema_editor.connection.alias)
+        last_pk = rows.aggregate(last=models.Max('pk'))['last'] or 0
+        for start in range(0, last_pk + 1, BACKFILL_BATCH):
+            with transaction.atomic(using=schema_editor.connection.alias):
+                rows.filter(
+                    pk__gte=start, pk__lt=start + BACKFILL_BATCH,
+                    updated_at__isnull=True,
+                ).update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('blog', '0012_add_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ] + [
+        migrations.AlterField(
+            model_name=model_name,
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        )
+        for model_name in MODEL_NAMES
+    ]
@@ -46,11 +46,28 @@ class Post(PublishedModel):
     )
 
     image = models.ImageField('Фото', upload_to='post_images', blank=True)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0, editable=False)
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_published_feed_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+        )
 
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'post_id': self.id})
@@ -104,6 +121,13 @@ class Comment(models.Model):
                                verbose_name='Автор')
     created_at = models.DateTimeField('Дата и время создания',
                                       auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True, db_index=True)
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_thread_idx',
+            ),
+        )
@@ -0,0 +1,179 @@
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .cache import (
+    INDEX_FEED_TAG, author_feed_tag, category_feed_tag, object_tag,
+    purge_tags, schedule_publication)
+from .models import Category, Comment, Post
+from .search import index_comments, index_posts
+from .signals import apply_comment_counts
+from core.work_queue import work_queue
+
+MODERATION_BATCH = 1000
+
+
+def pk_batches(queryset, batch_size=MODERATION_BATCH):
+    """Первичные ключи выборки пачками, без загрузки объектов"""
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(
+            pk__gt=last_pk)
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def apply_purge_batches(batches):
+    purge_tags(*set().union(*batches))
+
+
+def queue_purge_batch(tags):
+    """Ставит в очередь сброс тегов пачки одним событием"""
+    work_queue.submit(apply_purge_batches, frozenset(tags))
+
+
+def index_post_batches(batches):
+    index_posts(set().union(*batches))
+
+
+def index_comment_batches(batches):
+    index_comments(set().union(*batches))
+
+
+def queue_post_index(post_ids):
+    """Ставит в очередь переиндексацию пачки публикаций одним событием"""
+    if post_ids:
+        work_queue.submit(index_post_batches, frozenset(post_ids))
+
+
+def queue_comment_index(comment_ids):
+    """Ставит в очередь переиндексацию пачки комментариев одним событием"""
+    if comment_ids:
+        work_queue.submit(index_comment_batches, frozenset(comment_ids))
+
+
+def _delete_rows(model, field, values):
+    """Удаляет строки модели с field из values одним запросом DELETE.
+
+    Модерация удаляет строки в обход ORM только здесь: без загрузки
+    объектов, сигналов на каждую строку и каскада. Зависимые строки
+    вызывающий удаляет раньше, а счётчики, индекс и кэш обновляет сам.
+    """
+    values = list(values)
+    if not values:
+        return
+    column = model._meta.get_field(field).column
+    placeholders = ', '.join(['%s'] * len(values))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {model._meta.db_table}'
+            f' WHERE {column} IN ({placeholders})', values)
+
+
+def _post_feed_tags(post_ids):
+    tags = {object_tag(Post, pk) for pk in post_ids} | {INDEX_FEED_TAG}
+    for category_id, author_id in Post.objects.filter(
+            pk__in=post_ids).order_by().values_list(
+                'category_id', 'author_id').distinct():
+        tags |= {category_feed_tag(category_id), author_feed_tag(author_id)}
+    return tags
+
+
+def _author_feed_tags(category_ids):
+    """Теги лент авторов, у которых есть публикации в категориях"""
+    return {author_feed_tag(author_id) for author_id in Post.objects.filter(
+        category__in=category_ids).order_by().values_list(
+            'author_id', flat=True).distinct()}
+
+
+def _published_tags(model, pks):
+    """Теги кэша, которые сбрасывает смена публикации объектов"""
+    if model is Post:
+        return _post_feed_tags(pks)
+    tags = {object_tag(model, pk) for pk in pks}
+    if model is Category:
+        tags |= {INDEX_FEED_TAG} | {category_feed_tag(pk) for pk in pks}
+        tags |= _author_feed_tags(pks)
+    return tags
+
+
+def set_published(queryset, is_published):
+    """Публикует или снимает с публикации объекты выборки.
+
+    Каждая пачка меняется одним UPDATE, и кэш сбрасывается один раз
+    на пачку; сигналы сохранения не вызываются. Возвращает число
+    изменённых объектов.
+    """
+    model = queryset.model
+    changed = queryset.exclude(is_published=is_published)
+    updated = 0
+    for pks in pk_batches(changed):
+        with transaction.atomic():
+            # update() не трогает поля auto_now.
+            updated += model.objects.filter(pk__in=pks).update(
+                is_published=is_published, updated_at=timezone.now())
+            queue_purge_batch(_published_tags(model, pks))
+        if model is Post and is_published:
+            scheduled = Post.objects.filter(
+                pk__in=pks, pub_date__gt=timezone.now()
+            ).order_by('pub_date').values_list('pub_date', flat=True).first()
+            if scheduled:
+                schedule_publication(scheduled)
+    return updated
+
+
+def delete_post(post):
+    """Удаляет публикацию вместе с её комментариями.
+
+    Комментарии удаляются одним запросом DELETE, а не каскадом с
+    сигналами на каждый: счётчик удаляемой публикации обновлять не
+    нужно, а поисковый индекс обновляется одним событием очереди.
+    """
+    with transaction.atomic():
+        comment_ids = list(Comment.objects.filter(post=post).order_by(
+        ).values_list('pk', flat=True))
+        for start in range(0, len(comment_ids), MODERATION_BATCH):
+            _delete_rows(
+                Comment, 'id',
+                comment_ids[start:start + MODERATION_BATCH])
+        post.delete()
+        queue_comment_index(comment_ids)
+
+
+def delete_by_authors(author_ids):
+    """Удаляет публикации и комментарии авторов пачками.
+
+    Строки удаляются запросами DELETE без загрузки объектов, поэтому
+    счётчики комментариев, поисковый индекс и кэш обновляются здесь —
+    по одному разу на пачку, через очередь. Возвращает число удалённых
+    публикаций и комментариев.
+    """
+    author_ids = list(author_ids)
+    deleted_posts = deleted_comments = 0
+    for pks in pk_batches(Post.objects.filter(author__in=author_ids)):
+        with transaction.atomic():
+            tags = _post_feed_tags(pks)
+            comment_ids = list(Comment.objects.filter(
+                post__in=pks).order_by().values_list('pk', flat=True))
+            _delete_rows(Comment, 'post', pks)
+            _delete_rows(Post, 'id', pks)
+            queue_post_index(pks)
+            queue_comment_index(comment_ids)
+            queue_purge_batch(tags)
+        deleted_posts += len(pks)
+        deleted_comments += len(comment_ids)
+    for pks in pk_batches(Comment.objects.filter(author__in=author_ids)):
+        with transaction.atomic():
+            deltas = {
+                post_id: -total for post_id, total in Comment.objects
+                .filter(pk__in=pks).order_by().values_list('post_id')
+                .annotate(total=Count('pk'))}
+            _delete_rows(Comment, 'id', pks)
+            apply_comment_counts(deltas)
+            queue_comment_index(pks)
+        deleted_comments += len(pks)
+    return deleted_posts, deleted_comments
@@ -0,0 +1,178 @@
+import math
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from core.search import tokenize
+from core.utils import filter_posts, select_post_cards
+
+from .models import Comment, Post
+
+SEARCH_TABLE = 'blog_search'
+SEARCH_CHUNK = 200
+
+
+def _post_rowid(post_id):
+    return post_id * 2
+
+
+def _comment_rowid(comment_id):
+    return comment_id * 2 + 1
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def _stemmed(text):
+    return ' '.join(tokenize(text))
+
+
+def index_posts(post_ids):
+    """Переиндексирует публикации; удалённые убирает из индекса.
+
+    В индекс FTS5 пишутся основы слов, а не исходный текст, поэтому
+    поиск находит разные формы слова.
+    """
+    post_ids = list(post_ids)
+    if not search_available() or not post_ids:
+        return
+    posts = Post.objects.filter(pk__in=post_ids).values_list(
+        'pk', 'title', 'text')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+            [(_post_rowid(post_id),) for post_id in post_ids])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, body, post_id)'
+            ' VALUES (%s, %s, %s, %s)',
+            [(_post_rowid(pk), _stemmed(title), _stemmed(text), pk)
+             for pk, title, text in posts])
+
+
+def index_comments(comment_ids):
+    """Переиндексирует комментарии; удалённые убирает из индекса"""
+    comment_ids = list(comment_ids)
+    if not search_available() or not comment_ids:
+        return
+    comments = Comment.objects.filter(pk__in=comment_ids).values_list(
+        'pk', 'text', 'post_id')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+            [(_comment_rowid(comment_id),) for comment_id in comment_ids])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, body, post_id)'
+            " VALUES (%s, '', %s, %s)",
+            [(_comment_rowid(pk), _stemmed(text), post_id)
+             for pk, text, post_id in comments])
+
+
+def clear_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+
+def match_expression(query):
+    """Запрос FTS5 из основ слов; все слова обязательны"""
+    return ' '.join(
+        '"{}"'.format(term.replace('"', '""')) for term in tokenize(query))
+
+
+def matching_posts(match):
+    """Подзапрос id публикаций с совпадением в заголовке или тексте"""
+    return RawSQL(
+        f'SELECT post_id FROM {SEARCH_TABLE}'
+        f' WHERE {SEARCH_TABLE} MATCH %s AND rowid %% 2 = 0', [match])
+
+
+def _ranked_rows(match, after, limit):
+    """Совпадения по возрастанию rank после строки after = (rank, rowid).
+
+    Колонка rank таблицы считается как BM25 с весом заголовка (см.
+    миграцию 0011); меньше — лучше. С LIMIT SQLite держит при сортировке
+    только limit лучших строк, без группировки всех совпадений.
+    """
+    sql = (f'SELECT rank, rowid, post_id FROM {SEARCH_TABLE}'
+           f' WHERE {SEARCH_TABLE} MATCH %s')
+    params = [match]
+    if after is not None:
+        sql += ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+        params += [after[0], after[0], after[1]]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql + ' ORDER BY rank, rowid LIMIT %s', [*params, limit])
+        return cursor.fetchall()
+
+
+def _matched_before(match, start, post_ids):
+    """Публикации из post_ids с совпадением раньше строки start"""
+    if start is None or not post_ids:
+        return set()
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT DISTINCT post_id FROM {SEARCH_TABLE}'
+            f' WHERE {SEARCH_TABLE} MATCH %s'
+            ' AND (rank < %s OR (rank = %s AND rowid < %s))'
+            f' AND post_id IN ({placeholders})',
+            [match, start[0], start[0], start[1], *post_ids])
+        return {post_id for post_id, in cursor.fetchall()}
+
+
+def encode_cursor(row):
+    rank, rowid = row
+    return f'{rank!r}_{rowid}'
+
+
+def decode_cursor(cursor):
+    """Строка (rank, rowid), с которой начинается страница, или None"""
+    try:
+        rank, rowid = (cursor or '').split('_')
+        row = float(rank), int(rowid)
+    except ValueError:
+        return None
+    return row if math.isfinite(row[0]) else None
+
+
+def search_posts(query, per_page, cursor=None):
+    """Страница найденных публикаций, видимых в лентах.
+
+    Совпадения читаются из индекса по релевантности пачками, с
+    продолжением от последней прочитанной строки, а не со смещения.
+    Совпадения в комментариях относятся к их публикации, и публикация
+    стоит на месте своего лучшего совпадения: публикации, у которых
+    совпадение было на прошлых страницах, пропускаются. Выдача
+    фильтруется по правилам filter_posts, пока страница не заполнится.
+    Возвращает публикации и курсор следующей страницы (или None).
+    """
+    match = match_expression(query)
+    if not search_available() or not match:
+        return [], None
+    start = decode_cursor(cursor)
+    visible = select_post_cards(filter_posts(Post.objects))
+    # Первая строка каждой публикации на этой странице и дальше.
+    first_rows = {}
+    seen = set()
+    found = []
+    # Строка start входит в страницу; rowid — целые числа.
+    after = None if start is None else (start[0], start[1] - 1)
+    while len(found) <= per_page:
+        rows = _ranked_rows(match, after, SEARCH_CHUNK)
+        new_rows = {}
+        for rank, rowid, post_id in rows:
+            if post_id not in seen and post_id not in new_rows:
+                new_rows[post_id] = (rank, rowid)
+        seen |= new_rows.keys()
+        shown = _matched_before(match, start, list(new_rows))
+        posts = visible.in_bulk(new_rows.keys() - shown)
+        for post_id, row in new_rows.items():
+            if post_id in posts:
+                first_rows[post_id] = row
+                found.append(posts[post_id])
+        if len(rows) < SEARCH_CHUNK:
+            break
+        after = rows[-1][:2]
+    if len(found) <= per_page:
+        return found, None
+    return found[:per_page], encode_cursor(first_rows[found[per_page].pk])
@@ -0,0 +1,175 @@
+import operator
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+
+from .cache import (
+    INDEX_FEED_TAG, author_feed_tag, category_feed_tag, object_tag,
+    purge_tags, schedule_publication)
+from .models import Category, Comment, Location, Post
+from .search import index_comments, index_posts
+from .sitemaps import forget_profiles
+from .thumbnails import queue_thumbnails
+from core.work_queue import work_queue
+
+User = get_user_model()
+
+# Поля, от которых зависит, в какие ленты попадает объект.
+FEED_STATE_FIELDS = {
+    Post: ('pub_date', 'is_published', 'category_id'),
+    Category: ('is_published',),
+}
+
+
+def apply_comment_counts(deltas):
+    """Применяет накопленные изменения счётчиков комментариев.
+
+    Публикации с одинаковым изменением обновляются одним запросом.
+    """
+    post_ids_by_delta = defaultdict(list)
+    for post_id, delta in deltas.items():
+        if delta:
+            post_ids_by_delta[delta].append(post_id)
+    for delta, post_ids in post_ids_by_delta.items():
+        Post.objects.filter(pk__in=post_ids).update(
+            comment_count=Greatest(F('comment_count') + delta, 0))
+    purge_tags(*(object_tag(Post, post_id) for post_id in deltas))
+
+
+def apply_purge_tags(tags):
+    purge_tags(*tags)
+
+
+def queue_purge(*tags):
+    for tag in tags:
+        work_queue.submit(apply_purge_tags, tag)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """Увеличивает счётчик комментариев публикации при добавлении"""
+    if created and not kwargs.get('raw'):
+        work_queue.submit(
+            apply_comment_counts, instance.post_id, 1, operator.add)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Уменьшает счётчик комментариев публикации при удалении,
+
+    в том числе каскадном — вместе с автором комментария.
+    """
+    work_queue.submit(
+        apply_comment_counts, instance.post_id, -1, operator.add)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Category)
+def remember_feed_state(sender, instance, raw=False, **kwargs):
+    """Запоминает состояние объекта в базе до сохранения"""
+    instance._feed_state = None
+    if instance.pk and not raw:
+        instance._feed_state = sender.objects.filter(
+            pk=instance.pk).values_list(*FEED_STATE_FIELDS[sender]).first()
+
+
+def _feed_state_changed(sender, instance):
+    state = tuple(
+        getattr(instance, field) for field in FEED_STATE_FIELDS[sender])
+    return getattr(instance, '_feed_state', None) != state
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц с публикацией.
+
+    Ленты целиком сбрасываются, только если публикация в них
+    появляется или из них пропадает; иначе достаточно тега самой
+    публикации.
+    """
+    tags = [object_tag(Post, instance.pk)]
+    if kwargs.get('created', True) or _feed_state_changed(sender, instance):
+        tags += [INDEX_FEED_TAG, category_feed_tag(instance.category_id),
+                 author_feed_tag(instance.author_id)]
+        old_state = getattr(instance, '_feed_state', None)
+        if old_state:
+            tags.append(category_feed_tag(old_state[-1]))
+    queue_purge(*tags)
+    if kwargs['signal'] is post_save and instance.is_published:
+        schedule_publication(instance.pub_date)
+
+
+def _category_author_ids(category_id):
+    return list(Post.objects.filter(category=category_id).order_by(
+    ).values_list('author_id', flat=True).distinct())
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_authors(sender, instance, **kwargs):
+    """Запоминает авторов публикаций категории до удаления.
+
+    К post_delete ссылка публикаций на категорию уже обнулена.
+    """
+    instance._feed_authors = _category_author_ids(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_feeds(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц с публикациями категории"""
+    tags = [object_tag(Category, instance.pk), category_feed_tag(instance.pk)]
+    if kwargs.get('created', True) or _feed_state_changed(sender, instance):
+        tags.append(INDEX_FEED_TAG)
+        # Публикации категории появляются в лентах авторов или пропадают.
+        author_ids = instance.__dict__.pop('_feed_authors', None)
+        if author_ids is None:
+            author_ids = _category_author_ids(instance.pk)
+        tags += [author_feed_tag(author_id) for author_id in author_ids]
+    queue_purge(*tags)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=User)
+def invalidate_post_cards(sender, instance, **kwargs):
+    """Сбрасывает кэш карточек публикаций, зависящих от объекта"""
+    if kwargs.get('update_fields') == frozenset(('last_login',)):
+        return
+    queue_purge(object_tag(sender, instance.pk))
+
+
+@receiver(post_save, sender=User)
+def forget_sitemap_profile(sender, instance, created, **kwargs):
+    """Помечает файл карты сайта с профилем для пересборки.
+
+    Адрес профиля содержит имя пользователя, которое отпечаток файла
+    не учитывает.
+    """
+    if created or kwargs.get('update_fields') == frozenset(('last_login',)):
+        return
+    work_queue.submit(forget_profiles, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def update_post_search_index(sender, instance, **kwargs):
+    work_queue.submit(index_posts, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def create_post_thumbnails(sender, instance, raw=False, **kwargs):
+    """Ставит в очередь уменьшенные копии изображения публикации"""
+    if instance.image and not raw:
+        queue_thumbnails(instance.image.name)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def update_comment_search_index(sender, instance, **kwargs):
+    work_queue.submit(index_comments, instance.pk)
@@ -0,0 +1,255 @@
+"""Карта сайта: заранее собранные файлы для поисковых роботов.
+
+В карте три раздела: публикации, категории и профили авторов, с теми
+же правилами видимости, что на сайте. Строки раздела делятся на файлы
+по диапазонам ключей: <раздел>-<n>.xml.gz содержит строки с ключами
+от n * SITEMAP_URLS до (n + 1) * SITEMAP_URLS, поэтому адресов в нём
+не больше SITEMAP_URLS, а изменённая строка затрагивает только свой
+файл. Отпечаток каждого диапазона — число и сумма ключей видимых
+строк и наибольшее время изменения — считается одним агрегатным
+запросом на раздел; файл пишется заново, только если отпечаток
+изменился. Отпечатки хранятся в MANIFEST рядом с файлами.
+
+Файлы лучше отдавать веб-сервером прямо из SITEMAP_ROOT; представление
+blog.views.sitemap нужно для работы без него.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import (
+    Count, ExpressionWrapper, F, IntegerField, Max, Sum)
+from django.db.models.functions import Greatest
+from django.urls import reverse
+
+from core.utils import filter_posts
+
+from .models import Category, Post
+
+SITEMAP_URLS = 50_000
+SITEMAP_ITERATOR_CHUNK = 2000
+SITEMAP_INDEX = 'sitemap.xml'
+MANIFEST = 'manifest.json'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+PK_PLACEHOLDER = 987654321
+
+
+def format_lastmod(value):
+    return value.astimezone(dt_timezone.utc).isoformat(timespec='seconds')
+
+
+def visible_posts():
+    return filter_posts(Post.objects).order_by().annotate(
+        lastmod=Greatest('pub_date', 'updated_at'))
+
+
+class Section:
+    """Раздел карты сайта"""
+
+    name = None
+    # Поле, по диапазонам которого строки делятся на файлы.
+    key = 'pk'
+
+    def queryset(self):
+        """Видимые строки раздела с временем изменения lastmod"""
+        raise NotImplementedError
+
+    def entries(self, rows, chunk_size):
+        """Пары (путь, время изменения) для строк диапазона"""
+        raise NotImplementedError
+
+    def fingerprints(self):
+        """Отпечатки диапазонов: {номер файла: [число, сумма, время]}"""
+        rows = self.queryset().annotate(chunk=ExpressionWrapper(
+            F(self.key) / SITEMAP_URLS, output_field=IntegerField(),
+        )).values('chunk').annotate(
+            total=Count(self.key, distinct=True),
+            key_sum=Sum(self.key, distinct=True),
+            last=Max('lastmod'),
+        ).order_by()
+        # Время с микросекундами: правка в ту же секунду тоже видна.
+        return {
+            str(row['chunk']): [
+                row['total'], row['key_sum'], row['last'].isoformat()]
+            for row in rows}
+
+    def chunk_entries(self, chunk, chunk_size=SITEMAP_ITERATOR_CHUNK):
+        start = int(chunk) * SITEMAP_URLS
+        rows = self.queryset().filter(**{
+            f'{self.key}__gte': start,
+            f'{self.key}__lt': start + SITEMAP_URLS,
+        }).order_by(self.key)
+        return self.entries(rows, chunk_size)
+
+
+class PostSection(Section):
+    name = 'posts'
+
+    def queryset(self):
+        return visible_posts()
+
+    def entries(self, rows, chunk_size):
+        # reverse() на каждую строку занимал большую часть сборки.
+        prefix, _, suffix = reverse(
+            'blog:post_detail', args=(PK_PLACEHOLDER,)
+        ).partition(str(PK_PLACEHOLDER))
+        for pk, lastmod in rows.values_list('pk', 'lastmod').iterator(
+                chunk_size=chunk_size):
+            yield f'{prefix}{pk}{suffix}', lastmod
+
+
+class CategorySection(Section):
+    name = 'categories'
+
+    def queryset(self):
+        return Category.objects.filter(is_published=True).annotate(
+            lastmod=F('updated_at'))
+
+    def entries(self, rows, chunk_size):
+        for slug, lastmod in rows.values_list('slug', 'lastmod').iterator(
+                chunk_size=chunk_size):
+            yield reverse('blog:category_posts', args=(slug,)), lastmod
+
+
+class ProfileSection(Section):
+    """Профили авторов хотя бы одной видимой публикации.
+
+    Время изменения профиля — время его последней видимой публикации.
+    Смену имени пользователя отпечаток не замечает, поэтому при
+    сохранении пользователя его диапазон убирается из MANIFEST
+    (forget_profiles) и пишется заново при следующей сборке.
+    """
+
+    name = 'profiles'
+    key = 'author_id'
+
+    def queryset(self):
+        return visible_posts()
+
+    def entries(self, rows, chunk_size):
+        for username, lastmod in rows.values(
+                'author_id', 'author__username').annotate(
+                    last=Max('lastmod')).values_list(
+                        'author__username', 'last').iterator(
+                            chunk_size=chunk_size):
+            yield reverse('blog:profile', args=(username,)), lastmod
+
+
+SECTIONS = (PostSection(), CategorySection(), ProfileSection())
+
+
+def chunk_filename(section, chunk):
+    return f'{section.name}-{chunk}.xml.gz'
+
+
+def _write_atomic(path, write):
+    """Записывает файл через временный, чтобы не отдать его наполовину"""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as output:
+        write(output)
+    os.replace(temporary, path)
+
+
+def write_urlset(path, entries, site_url):
+    def write(output):
+        # mtime=0: одинаковое содержимое даёт одинаковый файл.
+        with gzip.GzipFile(fileobj=output, mode='wb', mtime=0) as archive:
+            archive.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<urlset xmlns="{XMLNS}">\n'.encode())
+            for location, lastmod in entries:
+                archive.write(
+                    f'<url><loc>{escape(site_url + location)}</loc>'
+                    f'<lastmod>{format_lastmod(lastmod)}</lastmod>'
+                    '</url>\n'.encode())
+            archive.write(b'</urlset>\n')
+    _write_atomic(path, write)
+
+
+def write_index(path, files, site_url):
+    """Индекс карты сайта: files — пары (имя файла, время изменения)"""
+    def write(output):
+        output.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<sitemapindex xmlns="{XMLNS}">\n'.encode())
+        for name, lastmod in files:
+            location = site_url + reverse(
+                'sitemap_file', kwargs={'path': name})
+            output.write(
+                f'<sitemap><loc>{escape(location)}</loc>'
+                f'<lastmod>{format_lastmod(lastmod)}</lastmod>'
+                '</sitemap>\n'.encode())
+        output.write(b'</sitemapindex>\n')
+    _write_atomic(path, write)
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as manifest_file:
+            return json.load(manifest_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_manifest(path, manifest):
+    _write_atomic(
+        path, lambda output: output.write(json.dumps(manifest).encode()))
+
+
+def forget_profiles(user_ids):
+    """Убирает из MANIFEST диапазоны профилей этих пользователей"""
+    path = os.path.join(settings.SITEMAP_ROOT, MANIFEST)
+    manifest = _read_manifest(path)
+    profiles = manifest.get(ProfileSection.name, {})
+    chunks = {str(user_id // SITEMAP_URLS) for user_id in user_ids}
+    if chunks & profiles.keys():
+        for chunk in chunks:
+            profiles.pop(chunk, None)
+        _write_manifest(path, manifest)
+
+
+def build_sitemap(site_url=None, full=False,
+                  chunk_size=SITEMAP_ITERATOR_CHUNK):
+    """Пишет изменившиеся файлы карты сайта и индекс.
+
+    С full=True файлы пишутся заново независимо от отпечатков.
+    Возвращает число записанных, удалённых и оставленных файлов.
+    """
+    site_url = (site_url or settings.SITE_URL).rstrip('/')
+    root = settings.SITEMAP_ROOT
+    os.makedirs(root, exist_ok=True)
+    manifest_path = os.path.join(root, MANIFEST)
+    manifest = _read_manifest(manifest_path)
+    # Со сменой адреса сайта меняются все ссылки.
+    full = full or manifest.get('site_url') != site_url
+    written = removed = kept = 0
+    new_manifest = {'site_url': site_url}
+    index = []
+    for section in SECTIONS:
+        old = manifest.get(section.name, {})
+        fingerprints = section.fingerprints()
+        for chunk, fingerprint in sorted(
+                fingerprints.items(), key=lambda item: int(item[0])):
+            name = chunk_filename(section, chunk)
+            path = os.path.join(root, name)
+            if (not full and old.get(chunk) == fingerprint
+                    and os.path.exists(path)):
+                kept += 1
+            else:
+                write_urlset(
+                    path, section.chunk_entries(chunk, chunk_size), site_url)
+                written += 1
+            index.append((name, datetime.fromisoformat(fingerprint[2])))
+        for chunk in old.keys() - fingerprints.keys():
+            try:
+                os.remove(os.path.join(root, chunk_filename(section, chunk)))
+            except FileNotFoundError:
+                pass
+            removed += 1
+        new_manifest[section.name] = fingerprints
+    write_index(os.path.join(root, SITEMAP_INDEX), index, site_url)
+    _write_manifest(manifest_path, new_manifest)
+    return written, removed, kept
@@ -0,0 +1,34 @@
+from django import template
+
+from blog.thumbnails import cached_thumbnails
+
+register = template.Library()
+
+# Карточка публикации шириной 40rem с внутренними отступами по 1rem.
+IMAGE_SIZES = '(max-width: 40rem) 100vw, 38rem'
+FALLBACK_WIDTH = 640
+
+
+def _srcset(image, thumbnails):
+    return ', '.join(
+        f'{image.storage.url(name)} {width}w' for width, name in thumbnails)
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(image, lazy=False):
+    """Изображение публикации с уменьшенными копиями в srcset.
+
+    Если копий ещё нет, выводится оригинал, а создание копий ставится
+    в очередь.
+    """
+    thumbnails = cached_thumbnails(image.name)
+    jpeg = thumbnails.get('jpg', [])
+    fallback = [name for width, name in jpeg if width <= FALLBACK_WIDTH]
+    return {
+        'url': image.url,
+        'src': image.storage.url(fallback[-1]) if fallback else image.url,
+        'webp_srcset': _srcset(image, thumbnails.get('webp', [])),
+        'jpeg_srcset': _srcset(image, jpeg),
+        'sizes': IMAGE_SIZES,
+        'lazy': lazy,
+    }
@@ -0,0 +1,176 @@
+"""Уменьшенные копии изображений публикаций.
+
+Для изображения Post.image хранятся копии шириной THUMBNAIL_WIDTHS,
+но не шире оригинала, в форматах WebP и JPEG:
+thumbnails/<имя файла без расширения>/<ширина>.<webp|jpg>. Копии
+создаются после сохранения публикации фоновой очередью в пуле
+потоков — Pillow отпускает GIL при масштабировании и сжатии. Шаблоны
+выводят готовые копии в srcset; если копий нет, показывается
+оригинал, а создание копий ставится в очередь.
+
+Список копий изображения хранится в кэше, чтобы показ страницы не
+читал каталог копий. Неполный список живёт в кэше ограниченное время:
+пока он там, копии не ставятся в очередь повторно — и пока они
+создаются, и после ошибки создания.
+"""
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from core.work_queue import work_queue
+
+from .cache import object_tag, purge_tags
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = 'thumbnails'
+THUMBNAIL_WIDTHS = (320, 640, 1280)
+# Расширение файла копии и формат Pillow с параметрами сохранения.
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+THUMBNAIL_WORKERS = 4
+THUMBNAILS_KEY = 'thumbnails:{}'
+# Через сколько секунд снова ставить в очередь копии, которые ещё
+# создаются или которые не удалось создать.
+THUMBNAIL_QUEUE_TIMEOUT = 60 * 10
+THUMBNAIL_RETRY_TIMEOUT = 60 * 60 * 24
+PURGE_BATCH = 500
+
+_pool = ThreadPoolExecutor(
+    max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+
+
+def image_storage():
+    return Post._meta.get_field('image').storage
+
+
+def thumbnail_dir(name):
+    return posixpath.join(THUMBNAIL_DIR, posixpath.splitext(name)[0])
+
+
+def existing_thumbnails(name):
+    """Готовые копии изображения: {расширение: [(ширина, имя), ...]}"""
+    directory = thumbnail_dir(name)
+    try:
+        _, files = image_storage().listdir(directory)
+    except FileNotFoundError:
+        return {}
+    found = {}
+    for filename in files:
+        width, _, extension = filename.partition('.')
+        if width.isdigit() and extension in THUMBNAIL_FORMATS:
+            found.setdefault(extension, []).append(
+                (int(width), posixpath.join(directory, filename)))
+    return {extension: sorted(thumbnails)
+            for extension, thumbnails in found.items()}
+
+
+def remember_thumbnails(name, retry_timeout=THUMBNAIL_QUEUE_TIMEOUT):
+    """Кладёт в кэш список копий; полный список хранится без срока"""
+    thumbnails = existing_thumbnails(name)
+    cache.set(
+        THUMBNAILS_KEY.format(name), thumbnails,
+        None if is_complete(thumbnails) else retry_timeout)
+    return thumbnails
+
+
+def cached_thumbnails(name):
+    """Копии изображения для показа; недостающие ставятся в очередь"""
+    thumbnails = cache.get(THUMBNAILS_KEY.format(name))
+    if thumbnails is None:
+        thumbnails = remember_thumbnails(name)
+        if not is_complete(thumbnails):
+            queue_thumbnails(name)
+    return thumbnails
+
+
+def is_complete(thumbnails):
+    """Есть копии во всех форматах, и ширины в них совпадают"""
+    widths = {
+        tuple(width for width, _ in thumbnails.get(extension, ()))
+        for extension in THUMBNAIL_FORMATS}
+    return len(widths) == 1 and () not in widths
+
+
+def _flatten(image):
+    """RGB-копия изображения; прозрачные области заливаются белым"""
+    if image.mode in ('RGBA', 'LA') or (
+            image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_thumbnails(name, force=False):
+    """Создаёт недостающие копии изображения; возвращает их число"""
+    if not force and is_complete(remember_thumbnails(name)):
+        return 0
+    storage = image_storage()
+    directory = thumbnail_dir(name)
+    with storage.open(name) as source:
+        image = Image.open(source)
+        # JPEG декодируется сразу в уменьшенном масштабе, но не меньше
+        # самой большой копии.
+        image.draft('RGB', (THUMBNAIL_WIDTHS[-1], THUMBNAIL_WIDTHS[-1]))
+        image = _flatten(ImageOps.exif_transpose(image))
+    width, height = image.size
+    created = 0
+    for target in sorted({min(size, width) for size in THUMBNAIL_WIDTHS}):
+        resized = image
+        if target < width:
+            resized = image.resize(
+                (target, max(1, round(height * target / width))),
+                Image.Resampling.LANCZOS)
+        for extension, (image_format, params) in THUMBNAIL_FORMATS.items():
+            path = posixpath.join(directory, f'{target}.{extension}')
+            if storage.exists(path):
+                if not force:
+                    continue
+                storage.delete(path)
+            output = BytesIO()
+            resized.save(output, image_format, **params)
+            storage.save(path, ContentFile(output.getvalue()))
+            created += 1
+    remember_thumbnails(name)
+    return created
+
+
+def _generate_logged(name):
+    try:
+        return generate_thumbnails(name)
+    except (OSError, Image.DecompressionBombError):
+        logger.warning('Не удалось создать копии %s', name, exc_info=True)
+        remember_thumbnails(name, THUMBNAIL_RETRY_TIMEOUT)
+        return 0
+
+
+def purge_image_posts(names):
+    """Сбрасывает кэш карточек публикаций с этими изображениями"""
+    names = list(names)
+    for start in range(0, len(names), PURGE_BATCH):
+        post_ids = Post.objects.filter(
+            image__in=names[start:start + PURGE_BATCH]
+        ).values_list('pk', flat=True)
+        purge_tags(*(object_tag(Post, post_id) for post_id in post_ids))
+
+
+def generate_batch(names):
+    """Обработчик очереди: создаёт копии пачки изображений в пуле"""
+    names = list(names)
+    created = _pool.map(_generate_logged, names)
+    purge_image_posts(
+        name for name, count in zip(names, created) if count)
+
+
+def queue_thumbnails(name):
+    work_queue.submit(generate_batch, name)
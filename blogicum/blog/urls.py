@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import feeds, views
 
 app_name = 'blog'
 
@@ -10,6 +10,7 @@ urlpatterns = [
          name='post_detail'),
     path('category/<slug:category_slug>/', views.category_posts,
          name='category_posts'),
+    path('search/', views.search, name='search'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
     path('posts/<int:post_id>/edit/', views.PostUpdateView.as_view(),
          name='edit_post'),
@@ -18,6 +19,8 @@ urlpatterns = [
     # Comments
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
+    path('posts/<int:post_id>/comments/', views.comment_list,
+         name='comments'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>/',
          views.comment_edit, name='edit_comment'),
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
@@ -25,4 +28,15 @@ urlpatterns = [
     # Profiles
     path('profile/<username>/', views.profile_details, name='profile'),
     path('profile/username/edit/', views.profile_edit, name='edit_profile'),
+    # Feeds
+    path('feed/', feeds.PostsFeed(), name='feed'),
+    path('feed/atom/', feeds.AtomPostsFeed(), name='atom_feed'),
+    path('category/<slug:category_slug>/feed/', feeds.CategoryPostsFeed(),
+         name='category_feed'),
+    path('category/<slug:category_slug>/feed/atom/',
+         feeds.AtomCategoryPostsFeed(), name='category_atom_feed'),
+    path('profile/<username>/feed/', feeds.AuthorPostsFeed(),
+         name='author_feed'),
+    path('profile/<username>/feed/atom/', feeds.AtomAuthorPostsFeed(),
+         name='author_atom_feed'),
 ]
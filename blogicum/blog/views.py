@@ -1,30 +1,115 @@
+import os
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy, reverse
-from django.utils import timezone
 
 from blog.models import Post, Category, Comment
+from .cache import (
+    INDEX_FEED_TAG, cached_feed_page, category_feed_tag, get_feed_page,
+    object_tag, set_card_versions, tag_versions)
 from .forms import PostForm, UserForm, CommentForm
-from core.utils import filter_posts, paginate
+from .moderation import delete_post
+from .search import search_posts
+from .sitemaps import SITEMAP_INDEX
+from core.db import gather_queries
+from core.utils import (
+    CURSOR_PARAM, KeysetPage, async_login_required, conditional_page,
+    filter_posts, make_etag, paginate, post_is_visible, select_post_cards)
 
 from django.contrib.auth.models import User
 from django.views.generic import (
     ListView, CreateView, UpdateView, DeleteView)
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseRedirect)
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from django.middleware.csrf import get_token
 
 PAGINATE_STEP = 10
+COMMENTS_PAGINATE_STEP = 50
+# Поля, которые выводит страница публикации.
+POST_PAGE_FIELDS = (
+    'title', 'text', 'image', 'pub_date', 'is_published', 'author__username',
+    'category__title', 'category__slug', 'category__is_published',
+    'location__name', 'location__is_published',
+)
+
+
+def feed_etag(request, feed_tag):
+    """Версии тегов записи страницы ленты в кэше как ETag"""
+    entry = cached_feed_page(feed_tag, request.GET.get(CURSOR_PARAM))
+    if entry is None:
+        return None
+    return make_etag(
+        request.user.pk, request.user.get_username(), entry['tags'])
+
+
+def index_etag(request, *args, **kwargs):
+    return feed_etag(request, INDEX_FEED_TAG)
+
+
+def category_etag(request, category_slug):
+    category = Category.objects.filter(slug=category_slug).values_list(
+        'pk', 'is_published').first()
+    if category is None or not category[1]:
+        return None
+    return feed_etag(request, category_feed_tag(category[0]))
+
+
+def post_etag(request, post_id):
+    """Поля публикации, итоги комментариев и версии тегов как ETag"""
+    comments = Comment.objects.filter(
+        post=OuterRef('pk')).order_by().values('post')
+    state = Post.objects.filter(pk=post_id).annotate(
+        total_comments=Subquery(
+            comments.annotate(total=Count('pk')).values('total')),
+        last_comment=Subquery(
+            comments.annotate(last=Max('updated_at')).values('last')),
+    ).values(*POST_PAGE_FIELDS, 'total_comments', 'last_comment').first()
+    if state is None:
+        return None
+    # Имена авторов первой страницы комментариев и миниатюры публикации
+    # не входят в выборку: их изменения отмечают версии тегов, как для
+    # фрагментов карточек.
+    author_ids = Comment.objects.filter(post_id=post_id).values_list(
+        'author_id', flat=True)[:COMMENTS_PAGINATE_STEP]
+    tags = [object_tag(Post, post_id)] + [
+        object_tag(User, author_id) for author_id in sorted(set(author_ids))]
+    versions = tag_versions(tags)
+    # Форма комментария содержит токен CSRF: после нового входа
+    # сохранённая страница отправила бы устаревший токен. get_token
+    # создаёт токен до отрисовки, если его ещё нет.
+    get_token(request)
+    return make_etag(
+        request.user.pk, request.user.get_username(),
+        request.META['CSRF_COOKIE'],
+        state['pub_date'] <= timezone.now(), state,
+        [versions.get(tag) for tag in tags])
 
 
 class OnlyAuthorMixin(UserPassesTestMixin):
     """Миксин проверки авторства объекта действий"""
 
+    def get_object(self, queryset=None):
+        # Объект нужен и для проверки, и самому представлению.
+        if getattr(self, '_object', None) is None:
+            self._object = super().get_object(queryset)
+        return self._object
+
     def test_func(self):
-        object = self.get_object()
-        return object.author == self.request.user
+        return self.get_object().author_id == self.request.user.id
 
 
+@method_decorator(conditional_page(index_etag), name='get')
 class IndexListView(LoginRequiredMixin, ListView):
     """CBV для главной страницы сайта, отображает все публикации"""
 
@@ -33,31 +118,60 @@ class IndexListView(LoginRequiredMixin, ListView):
     paginate_by = PAGINATE_STEP
 
     def get_queryset(self):
-        posts = filter_posts(Post.objects)
-        extended_set = posts.annotate(comment_count=Count('comments'))
-        return extended_set
+        return select_post_cards(filter_posts(Post.objects))
 
+    def paginate_queryset(self, queryset, page_size):
+        paginator = paginate(queryset, page_size)
+        page, self.feed = get_feed_page(
+            INDEX_FEED_TAG, paginator, self.request.GET.get(CURSOR_PARAM))
+        return (paginator, page, page.object_list, page.has_other_pages())
 
-@login_required
-def post_detail(request, post_id):
-    """Функция для отображения отдельного поста"""
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['feed'] = self.feed
+        return context
+
+
+@async_login_required
+@conditional_page(post_etag)
+async def post_detail(request, post_id):
+    """Функция для отображения отдельного поста.
+
+    Публикация и первая страница комментариев загружаются одновременно.
+    """
     template = 'blog/detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    category_id = post.category_id
-    category = Category.objects.get(pk=category_id)
+    post, comments = await gather_queries(
+        partial(
+            get_object_or_404,
+            Post.objects.select_related('author', 'category', 'location'),
+            pk=post_id),
+        paginate(
+            Comment.objects.filter(post_id=post_id).select_related('author'),
+            COMMENTS_PAGINATE_STEP
+        ).get_page)
+    if not post_is_visible(post, request.user):
+        return HttpResponse('Страница не найдена', status=404)
     form = CommentForm()
-    comments = post.comments.all()
     context = {'post': post,
                'comments': comments,
                'form': form}
-    if request.user == post.author:
-        return render(request, template, context)
-    else:
-        if post.is_published and post.pub_date < timezone.now()\
-                and category.is_published:
-            return render(request, template, context)
-        else:
-            return HttpResponse('Страница не найдена', status=404)
+    return await sync_to_async(render)(request, template, context)
+
+
+@login_required
+def comment_list(request, post_id):
+    """Функция для подгрузки следующей страницы комментариев публикации"""
+    template = 'includes/comment_list.html'
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'category'), pk=post_id)
+    if not post_is_visible(post, request.user):
+        return HttpResponse('Страница не найдена', status=404)
+    comments = paginate(
+        post.comments.select_related('author'), COMMENTS_PAGINATE_STEP
+    ).get_page(request.GET.get(CURSOR_PARAM))
+    context = {'post': post,
+               'comments': comments}
+    return render(request, template, context)
 
 
 class PostCreateView(LoginRequiredMixin, CreateView):
@@ -98,21 +212,50 @@ class PostDeleteView(OnlyAuthorMixin, DeleteView):
     template_name = 'blog/post_form.html'
     success_url = reverse_lazy('blog:index')
 
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        delete_post(self.object)
+        return HttpResponseRedirect(success_url)
 
-@login_required
-def category_posts(request, category_slug):
+
+@async_login_required
+@conditional_page(category_etag)
+async def category_posts(request, category_slug):
     """Функция для отображения категорий публикаций"""
     template = 'blog/category.html'
-    category = get_object_or_404(
-        Category, is_published=True, slug=category_slug)
-    category_posts = filter_posts(category.posts)
-    category_posts_ext = category_posts.annotate(
-        comment_count=Count('comments'))
-    paginator = paginate(category_posts_ext, PAGINATE_STEP)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+
+    def load():
+        # Ключ ленты в кэше зависит от категории, поэтому запросы идут
+        # друг за другом.
+        category = get_object_or_404(
+            Category, is_published=True, slug=category_slug)
+        category_posts = filter_posts(category.posts)
+        paginator = paginate(
+            select_post_cards(category_posts), PAGINATE_STEP)
+        return (category, *get_feed_page(
+            category_feed_tag(category.id), paginator,
+            request.GET.get(CURSOR_PARAM)))
+
+    category, page_obj, feed = await sync_to_async(load)()
     context = {'category': category,
-               'page_obj': page_obj}
+               'page_obj': page_obj,
+               'feed': feed}
+    return await sync_to_async(render)(request, template, context)
+
+
+@login_required
+def search(request):
+    """Функция для полнотекстового поиска по публикациям"""
+    template = 'blog/search.html'
+    query = request.GET.get('q', '').strip()
+    posts, next_cursor = search_posts(
+        query, PAGINATE_STEP, request.GET.get(CURSOR_PARAM))
+    set_card_versions(posts)
+    page_obj = KeysetPage(posts, None, next_cursor=next_cursor)
+    context = {'query': query,
+               'page_obj': page_obj,
+               'page_params': urlencode({'q': query}) + '&'}
     return render(request, template, context)
 
 
@@ -125,7 +268,8 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('blog:post_detail', post_id=post_id)
 
 
@@ -158,22 +302,30 @@ def comment_delete(request, post_id, comment_id):
     return render(request, 'blog/comment.html', context)
 
 
-def profile_details(request, username):
-    """Функция для просмотра профиля пользователя"""
+async def profile_details(request, username):
+    """Функция для просмотра профиля пользователя.
+
+    Профиль и страница его публикаций загружаются одновременно.
+    """
     template = 'blog/profile.html'
-    profile = get_object_or_404(User, username=username)
-    all_posts = profile.posts.all().order_by('-pub_date')
-    if request.user == profile:
-        user_posts = all_posts
-    else:
-        user_posts = filter_posts(all_posts)
-    user_posts_ext = user_posts.annotate(comment_count=Count('comments'))
-    paginator = paginate(user_posts_ext, PAGINATE_STEP)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+
+    def load_posts():
+        all_posts = Post.objects.filter(
+            author__username=username).order_by('-pub_date')
+        if request.user.username == username:
+            user_posts = all_posts
+        else:
+            user_posts = filter_posts(all_posts)
+        paginator = paginate(select_post_cards(user_posts), PAGINATE_STEP)
+        page_obj = paginator.get_page(request.GET.get(CURSOR_PARAM))
+        set_card_versions(page_obj)
+        return page_obj
+
+    profile, page_obj = await gather_queries(
+        partial(get_object_or_404, User, username=username), load_posts)
     context = {'profile': profile,
                'page_obj': page_obj}
-    return render(request, template, context)
+    return await sync_to_async(render)(request, template, context)
 
 
 @login_required
@@ -189,3 +341,27 @@ def profile_edit(request):
         form.save()
         return redirect('blog:profile', username=request.user)
     return render(request, template, context)
+
+
+def sitemap(request, path=SITEMAP_INDEX):
+    """Готовый файл карты сайта, собранный командой build_sitemap.
+
+    Имя файла ограничено шаблоном адреса, поэтому выйти за пределы
+    SITEMAP_ROOT нельзя.
+    """
+    try:
+        sitemap_file = open(os.path.join(settings.SITEMAP_ROOT, path), 'rb')
+    except FileNotFoundError:
+        raise Http404('Карта сайта не собрана.')
+    last_modified = int(os.fstat(sitemap_file.fileno()).st_mtime)
+    response = get_conditional_response(request, last_modified=last_modified)
+    if response is not None:
+        sitemap_file.close()
+        return response
+    # Сжатые файлы отдаются как архивы, без Content-Encoding: роботы
+    # распаковывают их сами.
+    response = FileResponse(sitemap_file, content_type=(
+        'application/gzip' if path.endswith('.gz')
+        else 'application/xml; charset=utf-8'))
+    response['Last-Modified'] = http_date(last_modified)
+    return response
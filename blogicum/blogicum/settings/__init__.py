@@ -0,0 +1,18 @@
+"""Настройки проекта.
+
+Профиль выбирается переменной окружения BLOGICUM_ENV: development
+(по умолчанию) или production.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+BLOGICUM_ENV = os.environ.get('BLOGICUM_ENV', 'development')
+
+if BLOGICUM_ENV == 'development':
+    from .development import *  # noqa: F401, F403
+elif BLOGICUM_ENV == 'production':
+    from .production import *  # noqa: F401, F403
+else:
+    raise ImproperlyConfigured(
+        f'Неизвестный профиль настроек BLOGICUM_ENV={BLOGICUM_ENV!r}')
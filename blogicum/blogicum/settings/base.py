@@ -1,15 +1,10 @@
+"""Настройки, общие для всех профилей"""
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-+rne#l7=lu&ez\
-(cu*!a%q8tc4c7ck5viv132xpiw3gek9z8z12'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = False
 
 ALLOWED_HOSTS: list = [
     'localhost',
@@ -27,11 +22,12 @@ INSTALLED_APPS = [
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
     'core.apps.CoreConfig',
-    'debug_toolbar',
     'django_bootstrap5',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.queries.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,7 +35,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -48,7 +43,7 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -67,14 +62,42 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+# core.backends.sqlite3 — бэкенд SQLite Django с дополнительными
+# OPTIONS transaction_mode и read_only.
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+# PRAGMA, которые выполняются на каждом новом соединении с SQLite.
+SQLITE_PRAGMAS: dict = {}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Кэш карточек и страниц лент работает и с файловым бэкендом
+# django.core.cache.backends.filebased.FileBasedCache.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+# Побочные эффекты записи (счётчики, сброс кэша) выполняются фоновым
+# потоком после фиксации транзакции; True — сразу, в той же транзакции.
+
+WORK_QUEUE_EAGER = False
+
+# Асинхронные представления выполняют независимые запросы к базе
+# одновременно, каждый в своём потоке; False — по очереди в потоке
+# запроса.
+
+CONCURRENT_QUERIES = True
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -122,10 +145,6 @@ STATICFILES_DIRS = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-INTERNAL_IPS = [
-    '127.0.0.1',
-]
-
 CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 
 LOGIN_URL = 'login'
@@ -137,3 +156,28 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Файлы карты сайта, которые пишет команда build_sitemap, и адрес сайта
+# для ссылок в них.
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITE_URL = 'http://127.0.0.1:8000'
+
+# /metrics отдаётся адресам из этих сетей или запросам с токеном.
+METRICS_ALLOWED_NETWORKS = ['127.0.0.0/8', '::1/128']
+METRICS_TOKEN = None
+
+SLOW_QUERY_SECONDS = 0.1
+
+DUPLICATE_QUERY_LIMIT = 2
+
+QUERY_BUDGET = None
+
+QUERY_BUDGETS = {
+    'blog': 10,
+    'blog:create_post': 15,
+    'blog:edit_post': 15,
+    'blog:delete_post': 15,
+    'pages': 5,
+}
+
+QUERY_BUDGET_STRICT = False
@@ -0,0 +1,102 @@
+"""Профиль для работы под нагрузкой.
+
+Секретный ключ, разрешённые хосты и адрес сайта берутся из
+переменных окружения DJANGO_SECRET_KEY, DJANGO_ALLOWED_HOSTS (через
+запятую) и DJANGO_SITE_URL.
+
+Кэш общий для всех процессов сервера: memcached по адресу из
+DJANGO_MEMCACHED, если он задан, иначе файлы в DJANGO_CACHE_DIR.
+
+За обратным прокси адрес клиента — адрес прокси, поэтому /metrics по
+умолчанию отдаётся только с токеном DJANGO_METRICS_TOKEN; сети, которым
+он доступен без токена, задаются в DJANGO_METRICS_NETWORKS.
+"""
+import os
+
+from .base import *  # noqa: F401, F403
+from .base import BASE_DIR, DATABASES, TEMPLATES
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN')
+METRICS_ALLOWED_NETWORKS = [
+    network for network in os.environ.get(
+        'DJANGO_METRICS_NETWORKS', '').split(',') if network]
+
+# Адрес сайта в ссылках карты сайта; угадать его по хостам нельзя.
+SITE_URL = os.environ['DJANGO_SITE_URL']
+
+# Версии тегов кэша сбрасываются в том процессе, который изменил
+# данные, и остальные процессы должны это видеть: LocMemCache у каждого
+# процесса свой. Файловый кэш при каждой записи перечисляет свой
+# каталог, поэтому под большой нагрузкой лучше memcached (клиент
+# pymemcache указан в requirements.txt).
+if os.environ.get('DJANGO_MEMCACHED'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ['DJANGO_MEMCACHED'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get(
+                'DJANGO_CACHE_DIR', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+
+# Соединения с базой переиспользуются между запросами. Запись идёт
+# через default, транзакции которого сразу берут блокировку записи и
+# ждут друг друга; чтение вне транзакций — через отдельное соединение
+# только для чтения к тому же файлу (в режиме WAL чтение не ждёт
+# записи).
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    },
+    # Имя совпадает с core.db.READ_DATABASE.
+    'reader': {
+        **DATABASES['default'],
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'read_only': True},
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['core.db.ReadWriteRouter']
+
+# WAL позволяет читать, пока идёт запись; synchronous=NORMAL в режиме
+# WAL не теряет целостность при сбое процесса.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+# Скомпилированные шаблоны хранятся в памяти процесса.
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [(
+            'django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        )],
+    },
+}]
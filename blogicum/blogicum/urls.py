@@ -1,14 +1,22 @@
+from django.apps import apps
 from django.contrib import admin
-from django.urls import path, include, reverse_lazy
+from django.urls import path, include, re_path, reverse_lazy
 from django.conf import settings
 
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
 from django.conf.urls.static import static
 
+from blog.views import sitemap
+from core.views import metrics
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
+    path('sitemap.xml', sitemap, name='sitemap'),
+    re_path(r'^sitemaps/(?P<path>[\w-]+\.xml\.gz)$', sitemap,
+            name='sitemap_file'),
     path('', include('blog.urls', namespace='blog')),
     path('pages/', include('pages.urls', namespace='pages')),
     path('auth/', include('django.contrib.auth.urls')),
@@ -23,7 +31,7 @@ urlpatterns = [
     ),
 ]
 
-if settings.DEBUG:
+if apps.is_installed('debug_toolbar'):
     import debug_toolbar
     # Добавить к списку urlpatterns список адресов из приложения debug_toolbar:
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
@@ -0,0 +1,35 @@
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с выбором режима транзакций и соединениями для чтения.
+
+    Дополнительные ключи OPTIONS:
+    transaction_mode — DEFERRED, IMMEDIATE или EXCLUSIVE, как в
+    Django 5.1. С IMMEDIATE транзакция сразу берёт блокировку записи
+    и ждёт её busy_timeout, а не падает с «database is locked», когда
+    читающая транзакция пытается начать запись;
+    read_only — соединение только для чтения (PRAGMA query_only).
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('transaction_mode', None)
+        params.pop('read_only', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        if self.settings_dict['OPTIONS'].get('read_only'):
+            conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is None:
+            return super()._start_transaction_under_autocommit()
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(f'Неизвестный режим транзакций {mode!r}')
+        self.cursor().execute(f'BEGIN {mode}')
@@ -0,0 +1,96 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+READ_DATABASE = 'reader'
+
+query_observers = ContextVar('query_observers', default=())
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Настраивает новое соединение с SQLite по SQLITE_PRAGMAS"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@contextmanager
+def observe_queries(observer):
+    """Передаёт observer все запросы к базе в текущем контексте.
+
+    observer устроен как обёртка connection.execute_wrapper, но, в
+    отличие от неё, видит запросы и из других потоков, запущенных из
+    этого контекста через sync_to_async.
+    """
+    token = query_observers.set(query_observers.get() + (observer,))
+    try:
+        yield observer
+    finally:
+        query_observers.reset(token)
+
+
+def run_query_observers(execute, sql, params, many, context):
+    for observer in query_observers.get():
+        execute = partial(observer, execute)
+    return execute(sql, params, many, context)
+
+
+def install_query_observers(sender, connection, **kwargs):
+    """Ставит run_query_observers на новое соединение"""
+    # В начало списка: execute_wrapper снимает обёртки с конца.
+    if run_query_observers not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, run_query_observers)
+
+
+def _in_worker_thread(function):
+    def run():
+        try:
+            return function()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather_queries(*functions):
+    """Выполняет независимые функции с запросами к базе одновременно.
+
+    Каждая функция работает в отдельном потоке со своим соединением
+    (sync_to_async с thread_sensitive=False), после чего устаревшие
+    соединения потока закрываются, как в конце запроса. С
+    CONCURRENT_QUERIES = False функции выполняются по очереди в потоке
+    запроса. Возвращает результаты в порядке функций.
+    """
+    if not settings.CONCURRENT_QUERIES:
+        return [await sync_to_async(function)() for function in functions]
+    return await asyncio.gather(*(
+        sync_to_async(_in_worker_thread(function), thread_sensitive=False)()
+        for function in functions))
+
+
+class ReadWriteRouter:
+    """Чтение — через соединение READ_DATABASE, запись — через default.
+
+    Внутри транзакции на default чтение идёт туда же, чтобы видеть
+    собственные незафиксированные изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return READ_DATABASE
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,236 @@
+"""Метрики запросов в формате Prometheus.
+
+Middleware замеряет каждый запрос: время ответа, число и время
+запросов к базе, время отрисовки шаблонов и размер ответа. Значения
+складываются в гистограммы по имени представления и отдаются
+представлением core.views.metrics — только адресам из
+METRICS_ALLOWED_NETWORKS или с токеном METRICS_TOKEN в заголовке
+Authorization: Bearer.
+
+Гистограммы не берут блокировок на запись: у каждого потока своя
+копия счётчиков, а при выдаче метрик копии суммируются.
+"""
+import asyncio
+import ipaddress
+import secrets
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+from .db import observe_queries
+
+UNRESOLVED_VIEW = '<unresolved>'
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+current_sample = ContextVar('current_sample', default=None)
+
+
+class Histogram:
+    """Гистограмма с меткой view"""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = []
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            self._shards.append(shard)
+            return shard
+
+    def observe(self, view, value):
+        shard = self._shard()
+        series = shard.get(view)
+        if series is None:
+            # Счётчики корзин, счётчик сверх последней корзины и сумма.
+            series = shard[view] = [0] * (len(self.buckets) + 1) + [0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self):
+        """Сумма копий всех потоков: {view: (корзины, сумма)}"""
+        total = {}
+        for shard in list(self._shards):
+            for view, series in list(shard.items()):
+                series = series[:]
+                if view in total:
+                    series = [a + b for a, b in zip(total[view], series)]
+                total[view] = series
+        return {view: (series[:-1], series[-1])
+                for view, series in total.items()}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        for view, (counts, total) in sorted(self.collect().items()):
+            label = 'view="{}"'.format(_escape(view))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{label},le="{bound}"}} '
+                    f'{cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {total}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n')
+
+
+REQUEST_SECONDS = Histogram(
+    'blogicum_request_duration_seconds', 'Время ответа.', SECONDS_BUCKETS)
+DB_QUERIES = Histogram(
+    'blogicum_db_queries', 'Запросов к базе за один ответ.', QUERY_BUCKETS)
+DB_SECONDS = Histogram(
+    'blogicum_db_duration_seconds', 'Время запросов к базе за один ответ.',
+    SECONDS_BUCKETS)
+TEMPLATE_SECONDS = Histogram(
+    'blogicum_template_render_seconds',
+    'Время отрисовки шаблонов за один ответ.', SECONDS_BUCKETS)
+RESPONSE_BYTES = Histogram(
+    'blogicum_response_size_bytes', 'Размер тела ответа.', SIZE_BUCKETS)
+HISTOGRAMS = (
+    REQUEST_SECONDS, DB_QUERIES, DB_SECONDS, TEMPLATE_SECONDS,
+    RESPONSE_BYTES)
+
+
+def metrics_allowed(request):
+    """Можно ли отдать метрики: токен или адрес из разрешённых сетей"""
+    token = settings.METRICS_TOKEN
+    if token and secrets.compare_digest(
+            request.headers.get('Authorization', '').encode(),
+            f'Bearer {token}'.encode()):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR'))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network)
+               for network in settings.METRICS_ALLOWED_NETWORKS)
+
+
+def render_metrics():
+    return '\n'.join(
+        line for histogram in HISTOGRAMS for line in histogram.render()
+    ) + '\n'
+
+
+class RequestSample:
+    """Замеры одного запроса.
+
+    Запросы к базе одного ответа могут идти из нескольких потоков
+    (gather_queries), поэтому счётчики меняются под блокировкой.
+    """
+
+    __slots__ = (
+        'queries', 'db_seconds', 'template_seconds', 'rendering', '_lock')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.rendering = False
+        self._lock = threading.Lock()
+
+    def execute(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            with self._lock:
+                self.queries += 1
+                self.db_seconds += elapsed
+
+
+class MetricsMiddleware:
+    """Замеряет запросы; должен стоять первым в MIDDLEWARE"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как в MiddlewareMixin: обработчик ASGI ждёт корутину.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        start = perf_counter()
+        try:
+            with observe_queries(sample.execute):
+                response = self.get_response(request)
+        finally:
+            current_sample.reset(token)
+        self.observe(request, sample, perf_counter() - start, response)
+        return response
+
+    async def __acall__(self, request):
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        start = perf_counter()
+        try:
+            with observe_queries(sample.execute):
+                response = await self.get_response(request)
+        finally:
+            current_sample.reset(token)
+        self.observe(request, sample, perf_counter() - start, response)
+        return response
+
+    @staticmethod
+    def observe(request, sample, elapsed, response):
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED_VIEW
+        REQUEST_SECONDS.observe(view, elapsed)
+        DB_QUERIES.observe(view, sample.queries)
+        DB_SECONDS.observe(view, sample.db_seconds)
+        TEMPLATE_SECONDS.observe(view, sample.template_seconds)
+        if not response.streaming:
+            RESPONSE_BYTES.observe(view, len(response.content))
+
+
+class TimedTemplate(Template):
+    """Шаблон, время отрисовки которого учитывается в метриках"""
+
+    def render(self, context=None, request=None):
+        sample = current_sample.get()
+        # Вложенная отрисовка уже учтена во внешней.
+        if sample is None or sample.rendering:
+            return super().render(context, request)
+        sample.rendering = True
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.rendering = False
+            sample.template_seconds += perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django с замером времени отрисовки"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -8,6 +8,7 @@ class PublishedModel(models.Model):
         'Опубликовано', default=True,
         help_text='Снимите галочку, чтобы скрыть публикацию.')
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True, db_index=True)
 
     class Meta:
         abstract = True
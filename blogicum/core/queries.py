@@ -0,0 +1,154 @@
+"""Журнал медленных запросов и поиск повторяющихся запросов.
+
+QueryInspectorMiddleware приводит SQL каждого запроса к отпечатку —
+без литералов и параметров — и после ответа сообщает о
+представлениях, которые выполнили один и тот же SELECT несколько раз
+(признак N+1) или превысили бюджет запросов. Медленные запросы
+пишутся в журнал сразу, с выдержкой из стека вызовов.
+
+Настройки:
+SLOW_QUERY_SECONDS — порог медленного запроса;
+DUPLICATE_QUERY_LIMIT — сколько раз можно повторить один SELECT;
+QUERY_BUDGET и QUERY_BUDGETS — общий бюджет запросов на ответ и
+бюджеты по имени представления или пространства имён (None — без
+ограничения);
+QUERY_BUDGET_STRICT — вместо записи в журнал выбрасывать
+QueryBudgetExceeded; включается в тестах.
+"""
+import asyncio
+import logging
+import re
+import threading
+import traceback
+from collections import Counter
+from time import perf_counter
+
+from django.conf import settings
+
+from .db import observe_queries
+
+logger = logging.getLogger(__name__)
+
+SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+SQL_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+STACK_DEPTH = 4
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило лишние запросы к базе"""
+
+
+def fingerprint(sql):
+    """SQL без литералов: одинаков у запросов, различающихся значениями"""
+    sql = SQL_LITERAL.sub('?', sql)
+    sql = SQL_PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def stack_excerpt():
+    """Последние вызовы из кода проекта"""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.endswith(__file__)
+    ]
+    return ''.join(traceback.format_list(frames[-STACK_DEPTH:]))
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else request.path
+
+
+class QueryInspector:
+    """Обёртка execute, которая собирает отпечатки запросов ответа.
+
+    Запросы одного ответа могут идти из нескольких потоков, поэтому
+    счётчики меняются под блокировкой.
+    """
+
+    def __init__(self, view=None):
+        self.view = view
+        self.total = 0
+        self.selects = Counter()
+        self.duplicate_stacks = {}
+        self.slow_seconds = settings.SLOW_QUERY_SECONDS
+        self.duplicate_limit = settings.DUPLICATE_QUERY_LIMIT
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            key = None
+            if sql.lstrip()[:6].upper() == 'SELECT':
+                key = fingerprint(sql)
+            repeats = 0
+            with self._lock:
+                self.total += 1
+                if key is not None:
+                    self.selects[key] += 1
+                    repeats = self.selects[key]
+            if repeats == self.duplicate_limit + 1:
+                self.duplicate_stacks[key] = stack_excerpt()
+            if elapsed >= self.slow_seconds:
+                logger.warning(
+                    'Медленный запрос (%.3f с) в %s: %s\n%s',
+                    elapsed, self.view, fingerprint(sql), stack_excerpt())
+
+    def budget(self):
+        """Бюджет представления, его пространства имён или общий"""
+        budgets = settings.QUERY_BUDGETS
+        namespace = self.view.rpartition(':')[0]
+        return budgets.get(
+            self.view, budgets.get(namespace, settings.QUERY_BUDGET))
+
+    def problems(self):
+        budget = self.budget()
+        found = []
+        if budget is not None and self.total > budget:
+            found.append(
+                f'{self.view}: {self.total} запросов при бюджете {budget}')
+        for key, stack in self.duplicate_stacks.items():
+            found.append(
+                f'{self.view}: запрос выполнен {self.selects[key]} раз'
+                f' (вероятно, N+1): {key}\n{stack}')
+        return found
+
+
+class QueryInspectorMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with observe_queries(QueryInspector(request.path)) as inspector:
+            response = self.get_response(request)
+        return self.report(request, inspector, response)
+
+    async def __acall__(self, request):
+        with observe_queries(QueryInspector(request.path)) as inspector:
+            response = await self.get_response(request)
+        return self.report(request, inspector, response)
+
+    @staticmethod
+    def report(request, inspector, response):
+        inspector.view = view_name(request)
+        problems = inspector.problems()
+        if problems and settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded('\n'.join(problems))
+        for problem in problems:
+            logger.warning(problem)
+        return response
@@ -0,0 +1,120 @@
+"""Разбор текста для полнотекстового поиска.
+
+Стеммер — упрощённая реализация алгоритма Snowball для русского языка
+(https://snowballstem.org/algorithms/russian/stemmer.html). Слова
+латиницей и числа только приводятся к нижнему регистру.
+"""
+import re
+
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'[а-я]')
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    (),
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'),
+)
+SUPERLATIVE = ((), ('ейш', 'ейше'))
+DERIVATIONAL = ((), ('ост', 'ость'))
+
+
+def _regions(word):
+    """Начала областей RV и R2 слова"""
+    def after_vowel_consonant(start):
+        for i in range(start + 1, len(word)):
+            if word[i] not in VOWELS and word[i - 1] in VOWELS:
+                return i + 1
+        return len(word)
+
+    rv = next(
+        (i + 1 for i, char in enumerate(word) if char in VOWELS), len(word))
+    r1 = after_vowel_consonant(0)
+    r2 = after_vowel_consonant(r1)
+    return rv, r2
+
+
+def _remove_ending(word, start, groups):
+    """Отрезает самое длинное окончание из групп в области от start.
+
+    Окончания первой группы отрезаются, только если перед ними стоит
+    «а» или «я». Если ничего не отрезано, возвращает None.
+    """
+    after_a, plain = groups
+    for ending in sorted(after_a + plain, key=len, reverse=True):
+        cut = len(word) - len(ending)
+        if not word.endswith(ending) or cut < start:
+            continue
+        if ending in plain:
+            return word[:cut]
+        if cut - 1 >= start and word[cut - 1] in 'ая':
+            return word[:cut]
+        return None
+    return None
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC.search(word):
+        return word
+    rv, r2 = _regions(word)
+
+    # Шаг 1: деепричастие, иначе возвратность и прилагательное,
+    # глагол или существительное.
+    stemmed = _remove_ending(word, rv, PERFECTIVE_GERUND)
+    if stemmed is None:
+        word = _remove_ending(word, rv, REFLEXIVE) or word
+        stemmed = _remove_ending(word, rv, ADJECTIVE)
+        if stemmed is not None:
+            stemmed = _remove_ending(stemmed, rv, PARTICIPLE) or stemmed
+        else:
+            stemmed = (_remove_ending(word, rv, VERB)
+                       or _remove_ending(word, rv, NOUN))
+    word = stemmed or word
+
+    # Шаг 2.
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3: словообразовательный суффикс в R2.
+    word = _remove_ending(word, r2, DERIVATIONAL) or word
+
+    # Шаг 4.
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        return word[:-1]
+    stemmed = _remove_ending(word, rv, SUPERLATIVE)
+    if stemmed is not None:
+        word = stemmed
+        return word[:-1] if word.endswith('нн') else word
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Основы слов текста в порядке следования"""
+    return [stem(word) for word in WORD.findall(text or '')]
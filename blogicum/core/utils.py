@@ -1,6 +1,28 @@
-from django.utils import timezone
+import asyncio
+import binascii
+import hashlib
+import json
+from collections.abc import Sequence
+from functools import cached_property, wraps
 
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.db.models.functions import Left
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+CURSOR_PARAM = 'cursor'
+POST_EXCERPT_LENGTH = 500
+ESTIMATED_COUNT_LIMIT = 1000
+POST_CARD_FIELDS = (
+    'title', 'pub_date', 'is_published', 'image', 'comment_count',
+    'author__username',
+    'category__title', 'category__slug', 'category__is_published',
+    'location__name', 'location__is_published',
+)
 
 
 def filter_posts(object_set):
@@ -12,5 +34,270 @@ def filter_posts(object_set):
     ).order_by('-pub_date')
 
 
-def paginate(object, step):
-    return Paginator(object, step)
+def post_is_visible(post, user):
+    """Те же правила видимости, что в filter_posts, для одной публикации"""
+    if user == post.author:
+        return True
+    return (post.is_published and post.pub_date <= timezone.now()
+            and post.category is not None and post.category.is_published)
+
+
+def async_login_required(view):
+    """login_required для асинхронных представлений"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # Пользователь загружается из сессии запросом к базе.
+        if await sync_to_async(lambda: request.user.is_authenticated)():
+            return await view(request, *args, **kwargs)
+        return redirect_to_login(request.get_full_path())
+    return wrapper
+
+
+def make_etag(*parts):
+    """Строит ETag из частей состояния страницы"""
+    return '"{}"'.format(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def _page_etag(etag_func, request, *args, **kwargs):
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    return etag_func(request, *args, **kwargs)
+
+
+def _not_modified(request, etag):
+    if etag is None:
+        return None
+    return get_conditional_response(request, etag=etag)
+
+
+def _with_validators(response, etag):
+    if etag is not None and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(etag_func):
+    """Условный GET по ETag для синхронных и асинхронных представлений.
+
+    etag_func(request, *args, **kwargs) вызывается до представления и
+    возвращает make_etag(...) или None, если состояние неизвестно.
+    Если ETag совпал с If-None-Match, отдаётся 304 без запросов за
+    содержимым страницы и без шаблонов. Страницы зависят от
+    пользователя, поэтому ответ помечается private, no-cache: браузер
+    хранит его, но проверяет при каждом показе.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                etag = await sync_to_async(_page_etag)(
+                    etag_func, request, *args, **kwargs)
+                response = _not_modified(request, etag)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _with_validators(response, etag)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                etag = _page_etag(etag_func, request, *args, **kwargs)
+                response = _not_modified(request, etag)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return _with_validators(response, etag)
+        return wrapper
+    return decorator
+
+
+def select_post_cards(object_set):
+    """Загружает только то, что выводит карточка публикации в ленте"""
+    return object_set.select_related(
+        'author', 'category', 'location'
+    ).only(*POST_CARD_FIELDS).annotate(
+        excerpt=Left('text', POST_EXCERPT_LENGTH))
+
+
+def paginate(object, step, with_count=False):
+    return KeysetPaginator(object, step, with_count=with_count)
+
+
+class InvalidCursor(ValueError):
+    """Курсор страницы повреждён или не подходит к выборке"""
+
+
+class KeysetPage(Sequence):
+    """Страница курсорной пагинации"""
+
+    cursor_based = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Курсорный пагинатор по ключу сортировки выборки.
+
+    Вместо LIMIT/OFFSET страница выбирается условием на значения
+    ключа сортировки последнего показанного объекта, поэтому глубокие
+    страницы стоят столько же, сколько первая. Ключ берётся из
+    order_by выборки (или Meta.ordering модели) и дополняется
+    первичным ключом для однозначности.
+    """
+
+    def __init__(self, object_list, per_page, with_count=False):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.with_count = with_count
+        self.ordering = self._get_ordering(object_list)
+
+    @staticmethod
+    def _get_ordering(queryset):
+        opts = queryset.model._meta
+        ordering = []
+        for name in queryset.query.order_by or opts.ordering:
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+            ordering.append((field, descending))
+        if not any(field == opts.pk for field, _ in ordering):
+            descending = ordering[-1][1] if ordering else False
+            ordering.append((opts.pk, descending))
+        return ordering
+
+    @cached_property
+    def count(self):
+        return self.object_list.count()
+
+    def encode_cursor(self, obj, backwards=False):
+        values = []
+        for field, _ in self.ordering:
+            value = getattr(obj, field.attname)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        payload = json.dumps([int(backwards), values])
+        return urlsafe_base64_encode(payload.encode())
+
+    @staticmethod
+    def cursor_key(cursor):
+        """Короткий ключ кэша страницы по содержимому курсора.
+
+        Первая страница и повреждённый курсор, который её открывает,
+        получают ключ ''.
+        """
+        if not cursor:
+            return ''
+        try:
+            backwards, values = json.loads(urlsafe_base64_decode(cursor))
+            if not isinstance(values, list):
+                raise ValueError(cursor)
+        except (binascii.Error, TypeError, ValueError):
+            return ''
+        return hashlib.md5(
+            json.dumps([bool(backwards), values]).encode()).hexdigest()
+
+    def decode_cursor(self, cursor):
+        try:
+            backwards, values = json.loads(urlsafe_base64_decode(cursor))
+            if len(values) != len(self.ordering):
+                raise InvalidCursor(cursor)
+            values = [
+                field.to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, TypeError, ValueError) as error:
+            raise InvalidCursor(cursor) from error
+        return bool(backwards), values
+
+    def _seek(self, values, backwards):
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= equal & Q(**{f'{field.attname}__{lookup}': value})
+            equal &= Q(**{field.attname: value})
+        return condition
+
+    def _order_by(self, backwards):
+        return [
+            f'-{field.attname}' if descending != backwards
+            else field.attname
+            for field, descending in self.ordering
+        ]
+
+    def get_queryset(self, values=None, backwards=False):
+        queryset = self.object_list.order_by(*self._order_by(backwards))
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        return queryset[:self.per_page + 1]
+
+    def page(self, cursor=None):
+        backwards, values = False, None
+        if cursor:
+            backwards, values = self.decode_cursor(cursor)
+        objects = list(self.get_queryset(values, backwards))
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if backwards:
+            objects.reverse()
+        next_cursor = previous_cursor = None
+        if objects:
+            if has_more or backwards:
+                next_cursor = self.encode_cursor(objects[-1])
+            if (has_more and backwards) or (values is not None
+                                            and not backwards):
+                previous_cursor = self.encode_cursor(
+                    objects[0], backwards=True)
+        return KeysetPage(objects, self, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки, который не считает всю таблицу целиком.
+
+    Оценка работает только для выборки без условий — списка без поиска
+    и фильтров: точно считаются не больше ESTIMATED_COUNT_LIMIT строк,
+    а если строк больше, количество оценивается сверху наибольшим
+    первичным ключом таблицы — это один шаг по индексу вместо COUNT(*).
+    Для выборки с условиями наибольший ключ ничего не говорит о числе
+    строк, и она считается точно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        if queryset.query.where:
+            return queryset.count()
+        exact = queryset[:ESTIMATED_COUNT_LIMIT + 1].count()
+        if exact <= ESTIMATED_COUNT_LIMIT:
+            return exact
+        last_pk = queryset.order_by('-pk').values_list(
+            'pk', flat=True).first()
+        return max(exact, last_pk or 0)
@@ -1,5 +1,8 @@
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from .metrics import metrics_allowed, render_metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', status=404)
@@ -7,3 +10,11 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html', status=403)
+
+
+def metrics(request):
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,74 @@
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def replace(old, new):
+    return new
+
+
+class WorkQueue:
+    """Очередь побочных эффектов записи с фоновым потоком.
+
+    Эффекты ставятся в очередь после фиксации транзакции и
+    объединяются по ключу: например, несколько изменений счётчика
+    одной публикации складываются в одно. Фоновый поток раз в
+    batch_delay секунд забирает накопленное и передаёт каждому
+    обработчику словарь {ключ: значение} одной пачкой.
+
+    С настройкой WORK_QUEUE_EAGER эффекты выполняются сразу, в той же
+    транзакции, — так очередь работает в тестах.
+    """
+
+    def __init__(self, batch_delay=0.05):
+        self.batch_delay = batch_delay
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._scheduled = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='work-queue')
+
+    def submit(self, handler, key, value=None, merge=replace):
+        if getattr(settings, 'WORK_QUEUE_EAGER', False):
+            handler({key: value})
+            return
+        transaction.on_commit(
+            lambda: self._enqueue(handler, key, value, merge))
+
+    def _enqueue(self, handler, key, value, merge):
+        with self._lock:
+            batch = self._pending.setdefault(handler, {})
+            batch[key] = merge(batch[key], value) if key in batch else value
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._executor.submit(self._run)
+
+    def _run(self):
+        time.sleep(self.batch_delay)
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        """Выполняет всё накопленное в текущем потоке"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled = False
+        for handler, batch in pending.items():
+            try:
+                handler(batch)
+            except Exception:
+                logger.exception('Ошибка обработчика %r', handler)
+
+
+work_queue = WorkQueue()
+atexit.register(work_queue.flush)
@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -41,6 +42,32 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def eager_work_queue():
+    with override_settings(WORK_QUEUE_EAGER=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budget():
+    with override_settings(QUERY_BUDGET_STRICT=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def serial_queries():
+    # Данные теста видны только внутри его транзакции, то есть только
+    # соединению потока теста.
+    with override_settings(CONCURRENT_QUERIES=False):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -361,6 +388,7 @@ def cleanup(request):
         for filename in files:
             if (
                     filename.endswith(".jpg")
+                    or filename.endswith(".webp")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
             ):
@@ -0,0 +1,139 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache import set_card_versions
+from blog.models import Category, Comment, Post
+from core import utils
+from core.utils import EstimatedCountPaginator
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_queries(client, url, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return len(context)
+
+
+@pytest.mark.parametrize("url, model", (
+    ("/admin/blog/post/", "blog.Post"),
+    ("/admin/blog/comment/", "blog.Comment"),
+))
+def test_admin_changelist_query_count_is_fixed(
+        admin_client, mixer, url, model):
+    mixer.cycle(2).blend(model)
+    few = count_queries(admin_client, url)
+    mixer.cycle(10).blend(model)
+    assert count_queries(admin_client, url) == few, (
+        "Убедитесь, что список объектов в админке загружает связанные"
+        " модели одним запросом."
+    )
+
+
+def test_admin_changelist_does_not_load_full_text(admin_client, mixer):
+    mixer.blend("blog.Post", text="Слово " * 1000)
+    response = admin_client.get("/admin/blog/post/")
+    post, = response.context["cl"].result_list
+    assert "text" in post.get_deferred_fields(), (
+        "Убедитесь, что список публикаций в админке не загружает текст"
+        " публикаций целиком."
+    )
+    assert len(post.text_preview) <= 101
+
+
+def test_admin_post_search_uses_index(admin_client, mixer, published_category):
+    found = mixer.blend("blog.Post", title="Горные озёра")
+    mixer.blend("blog.Post", title="Море")
+    response = admin_client.get("/admin/blog/post/", {"q": "озеро"})
+    assert list(response.context["cl"].result_list) == [found]
+
+
+def test_admin_category_search(admin_client, mixer):
+    found = mixer.blend("blog.Category", title="Путешествия", slug="travel")
+    mixer.blend("blog.Category", title="Кулинария", slug="food")
+    for term in ("Путеш", "travel"):
+        response = admin_client.get("/admin/blog/category/", {"q": term})
+        assert response.status_code == 200
+        assert list(response.context["cl"].result_list) == [found]
+
+
+def test_estimated_count_paginator(mixer, monkeypatch):
+    posts = mixer.cycle(5).blend("blog.Post")
+    queryset = Post.objects.order_by("pk")
+    assert EstimatedCountPaginator(queryset, 2).count == 5
+    monkeypatch.setattr(utils, "ESTIMATED_COUNT_LIMIT", 2)
+    Post.objects.filter(pk=posts[1].pk).delete()
+    assert EstimatedCountPaginator(queryset, 2).count == posts[-1].pk, (
+        "Убедитесь, что большие выборки в админке не считаются целиком."
+    )
+    filtered = queryset.filter(pk__in=[posts[0].pk, posts[-1].pk])
+    assert EstimatedCountPaginator(filtered, 2).count == 2, (
+        "Убедитесь, что выборка с поиском или фильтром в админке"
+        " считается точно."
+    )
+
+
+def test_admin_filtered_changelist_count(
+        admin_client, mixer, published_category, monkeypatch):
+    monkeypatch.setattr(utils, "ESTIMATED_COUNT_LIMIT", 2)
+    mixer.cycle(5).blend("blog.Post")
+    mixer.cycle(3).blend("blog.Post", category=published_category)
+    response = admin_client.get(
+        "/admin/blog/post/", {"category__id__exact": published_category.pk})
+    assert response.context["cl"].result_count == 3
+
+
+def run_action(client, url, action, objects):
+    return client.post(url, {
+        "action": action,
+        "_selected_action": [obj.pk for obj in objects],
+    })
+
+
+def test_bulk_unpublish_runs_one_update(
+        admin_client, mixer, user, published_category):
+    posts = mixer.cycle(5).blend(
+        "blog.Post", author=user, category=published_category)
+    card_before = set_card_versions(posts)[0].card_version
+    with CaptureQueriesContext(connection) as context:
+        run_action(admin_client, "/admin/blog/post/", "unpublish", posts)
+    updates = [
+        query for query in context
+        if query["sql"].startswith('UPDATE "blog_post"')]
+    assert len(updates) == 1, (
+        "Убедитесь, что массовое снятие с публикации выполняется одним"
+        " запросом UPDATE на пачку."
+    )
+    assert not Post.objects.filter(is_published=True).exists()
+    post = Post.objects.get(pk=posts[0].pk)
+    assert set_card_versions([post])[0].card_version != card_before
+
+
+def test_bulk_publish_categories(admin_client, mixer):
+    categories = mixer.cycle(3).blend("blog.Category", is_published=False)
+    run_action(admin_client, "/admin/blog/category/", "publish", categories)
+    assert Category.objects.filter(is_published=True).count() == 3
+
+
+def test_delete_authors_content(
+        admin_client, mixer, user, another_user, published_category):
+    spam = mixer.cycle(3).blend(
+        "blog.Post", author=another_user, category=published_category)
+    kept = mixer.blend("blog.Post", author=user, category=published_category)
+    mixer.cycle(2).blend("blog.Comment", post=spam[0], author=user)
+    mixer.cycle(2).blend("blog.Comment", post=kept, author=another_user)
+    mixer.blend("blog.Comment", post=kept, author=user)
+
+    run_action(
+        admin_client, "/admin/blog/post/", "delete_authors_content", spam[:1])
+
+    assert list(Post.objects.all()) == [kept]
+    assert list(Comment.objects.values_list("author", flat=True)) == [
+        user.pk]
+    kept.refresh_from_db()
+    assert kept.comment_count == 1, (
+        "Убедитесь, что массовое удаление комментариев обновляет счётчики"
+        " комментариев публикаций."
+    )
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from blog.models import Post
+from core.db import gather_queries, observe_queries
+from core.metrics import DB_QUERIES
+
+
+class QueryThreads:
+
+    def __init__(self):
+        self.threads = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.threads.add(threading.get_ident())
+        return execute(sql, params, many, context)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_gather_queries_runs_queries_concurrently(
+        settings, post_with_published_location):
+    settings.CONCURRENT_QUERIES = True
+    barrier = threading.Barrier(2, timeout=5)
+
+    def count_posts():
+        # Обе функции должны дойти сюда одновременно.
+        barrier.wait()
+        return Post.objects.count()
+
+    with observe_queries(QueryThreads()) as observer:
+        results = async_to_sync(gather_queries)(count_posts, count_posts)
+    assert results == [1, 1]
+    assert len(observer.threads) == 2, (
+        "Убедитесь, что запросы выполняются в разных потоках и видны"
+        " наблюдателям запросов."
+    )
+    assert threading.get_ident() not in observer.threads
+
+
+@pytest.mark.django_db
+def test_async_views_under_asgi(
+        user, post_with_published_location, published_category):
+    post = post_with_published_location
+    client = AsyncClient()
+    client.force_login(user)
+    _, before = DB_QUERIES.collect().get("blog:post_detail", ([], 0))
+    for url in (f"/posts/{post.id}/",
+                f"/category/{published_category.slug}/",
+                f"/profile/{user.username}/"):
+        response = async_to_sync(client.get)(url)
+        assert response.status_code == 200, url
+    assert post.title in async_to_sync(client.get)(
+        f"/posts/{post.id}/").content.decode()
+    _, after = DB_QUERIES.collect()["blog:post_detail"]
+    # Две загрузки страницы, в каждой публикация и комментарии.
+    assert after - before >= 4, (
+        "Убедитесь, что метрики учитывают запросы асинхронных представлений."
+    )
+
+
+@pytest.mark.django_db
+def test_async_view_requires_login(client, post_with_published_location):
+    post = post_with_published_location
+    response = client.get(f"/posts/{post.id}/")
+    assert response.status_code == 302
+    assert response.url.startswith("/auth/login/")
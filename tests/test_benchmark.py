@@ -0,0 +1,54 @@
+import io
+import json
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.cache import SCHEDULE_KEY
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def seeded():
+    cache.set(SCHEDULE_KEY, {"at": None}, None)
+    call_command(
+        "seed_benchmark", "--users", "3", "--categories", "2",
+        "--locations", "2", "--posts", "30", "--comments", "60",
+        "--scheduled", "0.3", "--batch-size", "7", stdout=io.StringIO())
+
+
+def test_seed_benchmark_volumes(seeded):
+    assert Post.objects.count() == 30
+    assert Comment.objects.count() == 60
+    assert Post.objects.filter(pub_date__gt=timezone.now()).exists(), (
+        "Убедитесь, что среди созданных публикаций есть отложенные."
+    )
+    assert sum(Post.objects.values_list("comment_count", flat=True)) == 60
+    assert cache.get(SCHEDULE_KEY) is None, (
+        "Убедитесь, что после наполнения базы расписание лент сбрасывается."
+    )
+
+
+def test_benchmark_reports_and_cleans_up(seeded, tmp_path):
+    output = tmp_path / "result.json"
+    call_command(
+        "benchmark", "--iterations", "3", "--warmup", "1",
+        "--output", str(output), stdout=io.StringIO())
+    report = json.loads(output.read_text())
+    assert set(report["scenarios"]) == {
+        "index", "category_posts", "post_detail", "profile", "add_comment"}
+    for result in report["scenarios"].values():
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["queries"] > 0
+    assert Comment.objects.count() == 60, (
+        "Убедитесь, что замер удаляет созданные комментарии."
+    )
+    assert sum(Post.objects.values_list("comment_count", flat=True)) == 60
+    call_command(
+        "benchmark", "--iterations", "2", "--warmup", "0",
+        "--baseline", str(output), "--tolerance", "100",
+        stdout=io.StringIO())
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog.cache import SCHEDULE_KEY, author_feed_tag, tag_versions
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_card_fragment_is_cached_and_invalidated(
+        user_client, mixer, post_with_published_location):
+    post = post_with_published_location
+    category = post.category
+    assert post.title in user_client.get("/").content.decode()
+
+    Post.objects.filter(pk=post.pk).update(title="Без сигнала")
+    content = user_client.get("/").content.decode()
+    assert post.title in content, (
+        "Убедитесь, что карточка публикации берётся из кэша, пока её"
+        " данные не изменились."
+    )
+
+    category.title = "Новая категория"
+    category.save()
+    content = user_client.get("/").content.decode()
+    assert "Без сигнала" in content and "Новая категория" in content, (
+        "Убедитесь, что изменение категории сбрасывает кэш карточек."
+    )
+
+    mixer.blend("blog.Comment", post=post)
+    content = user_client.get("/").content.decode()
+    assert "Комментарии (1)" in content, (
+        "Убедитесь, что новый комментарий сбрасывает кэш карточки."
+    )
+
+
+def test_publishing_purges_only_affected_feeds(
+        user_client, mixer, user, published_category, another_category):
+    mixer.blend("blog.Post", author=user, category=published_category)
+    other_url = f"/category/{another_category.slug}/"
+    Post.objects.create(
+        title="Старая", text="Текст", author=user,
+        category=another_category, pub_date=timezone.now())
+    user_client.get("/")
+    user_client.get(other_url)
+
+    Post.objects.filter(category=another_category).update(title="Тихо")
+    mixer.blend(
+        "blog.Post", title="Новая публикация", author=user,
+        category=published_category)
+
+    assert "Новая публикация" in user_client.get("/").content.decode(), (
+        "Убедитесь, что публикация поста сбрасывает кэш главной страницы."
+    )
+    assert "Старая" in user_client.get(other_url).content.decode(), (
+        "Убедитесь, что публикация поста не сбрасывает кэш страниц других"
+        " категорий."
+    )
+
+
+def test_scheduled_post_goes_live_in_cached_feed(
+        user_client, mixer, user, published_category):
+    mixer.blend("blog.Post", author=user, category=published_category)
+    scheduled = mixer.blend(
+        "blog.Post", title="Отложенная", author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(hours=1))
+    assert "Отложенная" not in user_client.get("/").content.decode()
+
+    Post.objects.filter(pk=scheduled.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1))
+    cache.set(SCHEDULE_KEY, {"at": timezone.now() - timedelta(seconds=1)})
+    assert "Отложенная" in user_client.get("/").content.decode(), (
+        "Убедитесь, что кэш ленты сбрасывается, когда наступает время"
+        " отложенной публикации."
+    )
+
+
+def test_category_delete_purges_author_feeds(
+        mixer, user, published_category):
+    mixer.blend("blog.Post", author=user, category=published_category)
+    tag = author_feed_tag(user.pk)
+    before = tag_versions([tag])
+    published_category.delete()
+    assert tag_versions([tag]) != before, (
+        "Убедитесь, что удаление категории сбрасывает ленты авторов её"
+        " публикаций."
+    )
@@ -0,0 +1,46 @@
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _comment_count(post):
+    return Post.objects.values_list(
+        "comment_count", flat=True).get(pk=post.pk)
+
+
+def test_comment_count_follows_comment_writes(
+        user_client, another_user, mixer, post_with_published_location):
+    post = post_with_published_location
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Первый"})
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Второй"})
+    assert _comment_count(post) == 2, (
+        "Убедитесь, что счётчик комментариев растёт при добавлении"
+        " комментария."
+    )
+
+    comment = Comment.objects.filter(post=post).first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    assert _comment_count(post) == 1
+
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    assert _comment_count(post) == 2
+    another_user.delete()
+    assert _comment_count(post) == 1, (
+        "Убедитесь, что счётчик комментариев уменьшается при каскадном"
+        " удалении комментариев."
+    )
+
+
+def test_recount_comments_fixes_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=42)
+    call_command("recount_comments", batch_size=1)
+    assert _comment_count(post) == 3
+
+
+def test_feed_queries_use_indexes():
+    call_command("explain_feeds")
@@ -0,0 +1,48 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from blog.views import COMMENTS_PAGINATE_STEP
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _comment_ids(content):
+    soup = BeautifulSoup(content.decode("utf-8"), features="html.parser")
+    return [
+        int(a["name"].split("_")[1])
+        for a in soup.find_all("a", attrs={"name": True})
+        if a["name"].startswith("comment_")
+    ]
+
+
+def test_comment_thread_is_paginated(
+        user_client, mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(COMMENTS_PAGINATE_STEP + 5).blend(
+        "blog.Comment", post=post)
+
+    response = user_client.get(f"/posts/{post.id}/")
+    first_page = _comment_ids(response.content)
+    assert first_page == [c.id for c in comments[:COMMENTS_PAGINATE_STEP]], (
+        "Убедитесь, что на странице поста выводится только первая"
+        " страница комментариев."
+    )
+
+    next_url = BeautifulSoup(
+        response.content.decode("utf-8"), features="html.parser"
+    ).find("a", class_="js-more-comments")["href"]
+    response = user_client.get(next_url)
+    assert _comment_ids(response.content) == [
+        c.id for c in comments[COMMENTS_PAGINATE_STEP:]]
+    assert b"js-more-comments" not in response.content
+
+
+def test_comment_fragment_respects_post_visibility(
+        user_client, another_user_client, mixer,
+        post_with_published_location):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    url = f"/posts/{post.id}/comments/"
+    assert user_client.get(url).status_code == 200
+    assert another_user_client.get(url).status_code == 404
@@ -0,0 +1,152 @@
+import re
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+
+from blog.cache import object_tag, purge_tags
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+# Сессия, пользователь, состояние публикации и авторы комментариев.
+NOT_MODIFIED_DETAIL_QUERIES = 4
+# Сессия и пользователь: состояние ленты берётся из кэша.
+NOT_MODIFIED_FEED_QUERIES = 2
+
+
+def revalidate(client, url):
+    etag = client.get(url)["ETag"]
+    return etag, client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+
+def test_post_detail_not_modified(
+        user_client, mixer, post_with_published_location,
+        django_assert_num_queries):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    response = user_client.get(url)
+    assert "private" in response["Cache-Control"]
+    assert "no-cache" in response["Cache-Control"]
+    etag = response["ETag"]
+    with django_assert_num_queries(NOT_MODIFIED_DETAIL_QUERIES):
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, (
+        "Убедитесь, что неизменившаяся страница публикации отдаётся с"
+        " кодом 304."
+    )
+    assert not response.content
+
+    mixer.blend("blog.Comment", post=post)
+    assert user_client.get(
+        url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+        "Убедитесь, что новый комментарий меняет ETag публикации."
+    )
+
+    etag = user_client.get(url)["ETag"]
+    post.title = "Новый заголовок"
+    post.save()
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert "Новый заголовок" in response.content.decode()
+
+
+def test_comment_author_and_thumbnails_change_etag(
+        user_client, mixer, post_with_published_location):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post)
+    url = f"/posts/{post.id}/"
+    etag = user_client.get(url)["ETag"]
+    comment.author.username = "переименованный"
+    comment.author.save()
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что смена имени автора комментария меняет ETag"
+        " публикации."
+    )
+    assert "переименованный" in response.content.decode()
+
+    etag = response["ETag"]
+    purge_tags(object_tag(Post, post.pk))
+    assert user_client.get(
+        url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+        "Убедитесь, что готовые миниатюры меняют ETag публикации."
+    )
+
+
+def test_etag_depends_on_user(
+        user_client, another_user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = user_client.get(url)["ETag"]
+    assert another_user_client.get(
+        url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def csrf_token(response):
+    return re.search(
+        r'name="csrfmiddlewaretoken" value="([^"]+)"',
+        response.content.decode()).group(1)
+
+
+def test_relogin_does_not_revalidate_stale_csrf_token(
+        user, post_with_published_location):
+    user.set_password("пароль")
+    user.save()
+    client = Client(enforce_csrf_checks=True)
+
+    def login():
+        token = csrf_token(client.get("/auth/login/"))
+        response = client.post("/auth/login/", {
+            "username": user.username, "password": "пароль",
+            "csrfmiddlewaretoken": token})
+        assert response.status_code == 302
+
+    url = f"/posts/{post_with_published_location.id}/"
+    login()
+    etag = client.get(url)["ETag"]
+    client.get("/auth/logout/")
+    login()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что после нового входа страница с формой отдаётся"
+        " заново, с новым токеном CSRF."
+    )
+    response = client.post(f"{url}comment/", {
+        "text": "Комментарий", "csrfmiddlewaretoken": csrf_token(response)})
+    assert response.status_code == 302
+
+
+def test_feeds_not_modified(
+        user_client, mixer, user, published_category,
+        many_posts_with_published_locations, django_assert_num_queries):
+    for url in ("/", f"/category/{published_category.slug}/"):
+        user_client.get(url)
+        etag = user_client.get(url)["ETag"]
+        queries = NOT_MODIFIED_FEED_QUERIES + url.startswith("/category/")
+        with django_assert_num_queries(queries):
+            response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            "Убедитесь, что неизменившаяся лента отдаётся с кодом 304."
+        )
+
+    etag, _ = revalidate(user_client, "/")
+    # Случайная дата mixer может поставить публикацию ниже первой
+    # страницы ленты.
+    mixer.blend(
+        "blog.Post", title="Свежая", author=user, category=published_category,
+        pub_date=timezone.now())
+    response = user_client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert "Свежая" in response.content.decode()
+
+
+def test_unpublished_category_is_not_revalidated(
+        user_client, published_category,
+        many_posts_with_published_locations):
+    url = f"/category/{published_category.slug}/"
+    user_client.get(url)
+    etag = user_client.get(url)["ETag"]
+    published_category.is_published = False
+    published_category.save()
+    assert user_client.get(
+        url, HTTP_IF_NONE_MATCH=etag).status_code == 404
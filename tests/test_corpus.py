@@ -0,0 +1,69 @@
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+
+from blog.corpus import read_json_array
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_export_import_round_trip(tmp_path, mixer, user, published_category):
+    created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category)
+    mixer.cycle(3).blend("blog.Comment", post=post, author=user)
+    Post.objects.update(created_at=created_at)
+    path = tmp_path / "blog.ndjson"
+    call_command("export_blog", str(path), stderr=io.StringIO())
+
+    Comment.objects.all().delete()
+    Post.objects.all().delete()
+    published_category.delete()
+    user.delete()
+    call_command(
+        "import_blog", str(path), "--batch-size", "2", stdout=io.StringIO())
+
+    imported = Post.objects.get(pk=post.pk)
+    assert imported.title == post.title
+    assert imported.created_at == created_at, (
+        "Убедитесь, что загрузка сохраняет исходные даты создания."
+    )
+    assert Comment.objects.filter(post=imported).count() == 3
+    assert imported.comment_count == 3, (
+        "Убедитесь, что после загрузки счётчики комментариев пересчитаны."
+    )
+
+
+def test_import_rejects_dangling_references(tmp_path):
+    path = tmp_path / "broken.ndjson"
+    path.write_text(json.dumps({
+        "model": "blog.comment", "pk": 1,
+        "fields": {"text": "Ответ", "post": 100, "author": 100,
+                   "created_at": "2020-01-01T00:00:00Z"},
+    }) + "\n")
+    with pytest.raises(CommandError):
+        call_command("import_blog", str(path), stdout=io.StringIO())
+    assert not Comment.objects.exists()
+
+
+def test_json_array_is_read_in_chunks(monkeypatch):
+    monkeypatch.setattr("blog.corpus.READ_CHUNK", 7)
+    records = [{"model": "blog.location", "pk": pk, "fields": {}}
+               for pk in range(5)]
+    stream = io.StringIO(json.dumps(records, indent=2))
+    assert list(read_json_array(stream)) == records
+
+
+def test_convert_fixture_keeps_blog_models(tmp_path):
+    path = tmp_path / "db.ndjson"
+    call_command(
+        "convert_fixture", str(settings.BASE_DIR / "db.json"), str(path),
+        stderr=io.StringIO())
+    models = {json.loads(line)["model"] for line in path.open()}
+    assert models == {
+        "auth.user", "blog.category", "blog.location", "blog.post"}
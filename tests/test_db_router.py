@@ -0,0 +1,71 @@
+import pytest
+from django.db import OperationalError, connection, transaction
+
+from blog.models import Post
+from core.backends.sqlite3.base import DatabaseWrapper
+from core.db import READ_DATABASE, ReadWriteRouter
+
+
+def sqlite_connection(path, alias, **options):
+    settings_dict = {
+        **connection.settings_dict, "NAME": str(path),
+        "OPTIONS": {"timeout": 0, **options}}
+    return DatabaseWrapper(settings_dict, alias)
+
+
+@pytest.fixture
+def database_file(tmp_path, db):
+    path = tmp_path / "db.sqlite3"
+    setup = sqlite_connection(path, "setup")
+    with setup.cursor() as cursor:
+        cursor.execute("CREATE TABLE item (id integer PRIMARY KEY)")
+    setup.close()
+    return path
+
+
+@pytest.mark.django_db(transaction=True)
+def test_router_reads_from_reader_outside_transactions():
+    router = ReadWriteRouter()
+    assert router.db_for_read(Post) == READ_DATABASE
+    assert router.db_for_write(Post) == "default"
+    with transaction.atomic():
+        assert router.db_for_read(Post) == "default", (
+            "Убедитесь, что внутри транзакции чтение идёт через default "
+            "и видит незафиксированные изменения."
+        )
+    assert not router.allow_migrate(READ_DATABASE, "blog")
+
+
+def test_immediate_transaction_takes_write_lock(database_file):
+    writer = sqlite_connection(
+        database_file, "writer", transaction_mode="IMMEDIATE")
+    other = sqlite_connection(database_file, "other")
+    writer.ensure_connection()
+    writer._start_transaction_under_autocommit()
+    try:
+        with pytest.raises(OperationalError, match="locked"), \
+                other.cursor() as cursor:
+            cursor.execute("INSERT INTO item VALUES (1)")
+    finally:
+        writer.connection.rollback()
+        writer.close()
+        other.close()
+
+
+def test_unknown_transaction_mode(database_file):
+    writer = sqlite_connection(
+        database_file, "writer", transaction_mode="LATER")
+    writer.ensure_connection()
+    with pytest.raises(ValueError):
+        writer._start_transaction_under_autocommit()
+    writer.close()
+
+
+def test_read_only_connection(database_file):
+    reader = sqlite_connection(database_file, "reader", read_only=True)
+    with reader.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM item")
+        assert cursor.fetchone() == (0,)
+        with pytest.raises(OperationalError):
+            cursor.execute("INSERT INTO item VALUES (1)")
+    reader.close()
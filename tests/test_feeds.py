@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog.cache import SCHEDULE_KEY
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feeds_follow_visibility_rules(
+        client, mixer, user, published_category, another_category):
+    mixer.blend(
+        "blog.Post", title="Видимая", author=user,
+        category=published_category)
+    mixer.blend(
+        "blog.Post", title="Скрытая", author=user,
+        category=published_category, is_published=False)
+    mixer.blend(
+        "blog.Post", title="Будущая", author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(days=1))
+    another_category.is_published = False
+    another_category.save()
+    mixer.blend(
+        "blog.Post", title="В скрытой категории", author=user,
+        category=another_category)
+    for url in ("/feed/", "/feed/atom/",
+                f"/category/{published_category.slug}/feed/",
+                f"/profile/{user.username}/feed/atom/"):
+        response = client.get(url)
+        assert response.status_code == 200, url
+        content = response.content.decode()
+        assert "Видимая" in content, url
+        assert "Скрытая" not in content and "Будущая" not in content, (
+            "Убедитесь, что в ленты подписки попадают только публикации,"
+            " видимые на сайте."
+        )
+        assert "В скрытой категории" not in content
+    assert client.get(
+        f"/category/{another_category.slug}/feed/").status_code == 404
+    assert client.get("/profile/nobody/feed/").status_code == 404
+
+
+def test_feed_if_modified_since(
+        client, mixer, user, published_category, django_assert_num_queries):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category)
+    response = client.get("/feed/")
+    last_modified = response["Last-Modified"]
+    with django_assert_num_queries(0):
+        response = client.get(
+            "/feed/", HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 304, (
+        "Убедитесь, что неизменившаяся лента подписки отдаётся с кодом 304"
+        " без запросов к базе данных."
+    )
+
+    mixer.blend(
+        "blog.Post", title="Свежая", author=user,
+        category=published_category)
+    response = client.get("/feed/", HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 200
+    assert "Свежая" in response.content.decode()
+    assert response["Last-Modified"] != last_modified
+
+
+def test_feed_is_cached_per_feed(
+        client, mixer, user, published_category, another_category):
+    other = mixer.blend(
+        "blog.Post", title="Старая", author=user,
+        category=another_category)
+    other_url = f"/category/{another_category.slug}/feed/"
+    client.get(other_url)
+    Post.objects.filter(pk=other.pk).update(title="Без сигнала")
+    mixer.blend(
+        "blog.Post", author=user, category=published_category)
+    assert "Старая" in client.get(other_url).content.decode(), (
+        "Убедитесь, что публикация в одной категории не перестраивает"
+        " ленты подписки других категорий."
+    )
+
+
+def test_scheduled_post_goes_live_in_feeds(
+        client, mixer, user, published_category):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category)
+    scheduled = mixer.blend(
+        "blog.Post", title="Отложенная", author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(hours=1))
+    author_url = f"/profile/{user.username}/feed/"
+    assert "Отложенная" not in client.get(author_url).content.decode()
+
+    released = timezone.now() - timedelta(seconds=1)
+    Post.objects.filter(pk=scheduled.pk).update(pub_date=released)
+    cache.set(SCHEDULE_KEY, {"at": released})
+    assert "Отложенная" in client.get(author_url).content.decode(), (
+        "Убедитесь, что лента автора перестраивается, когда наступает время"
+        " отложенной публикации."
+    )
@@ -0,0 +1,95 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.metrics import (
+    DB_QUERIES, REQUEST_SECONDS, MetricsMiddleware, RequestSample)
+from core.queries import QueryInspector
+
+pytestmark = [pytest.mark.django_db]
+
+
+def series_count(text, name, view):
+    match = re.search(
+        rf'^{name}_count{{view="{re.escape(view)}"}} (\d+)$', text, re.M)
+    return int(match.group(1)) if match else 0
+
+
+def test_metrics_endpoint_reports_views(client, post_with_published_location):
+    before = client.get("/metrics").content.decode()
+    client.get(f"/posts/{post_with_published_location.id}/")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    text = response.content.decode()
+    for name in (
+            "blogicum_request_duration_seconds", "blogicum_db_queries",
+            "blogicum_db_duration_seconds",
+            "blogicum_template_render_seconds",
+            "blogicum_response_size_bytes"):
+        assert series_count(text, name, "blog:post_detail") == (
+            series_count(before, name, "blog:post_detail") + 1), (
+            f"Убедитесь, что метрика {name} учитывает запрос к странице"
+            " публикации."
+        )
+    assert "# TYPE blogicum_db_queries histogram" in text
+
+
+def test_metrics_count_database_queries():
+    DB_QUERIES.observe("test:view", 3)
+    DB_QUERIES.observe("test:view", 40)
+    counts, total = DB_QUERIES.collect()["test:view"]
+    assert total == 43
+    assert counts[DB_QUERIES.buckets.index(3)] == 1
+    assert sum(counts) == 2
+
+
+def test_middleware_makes_no_queries(django_assert_num_queries):
+    response = HttpResponse("ok")
+    request = RequestFactory().get("/")
+    middleware = MetricsMiddleware(lambda request: response)
+    before = REQUEST_SECONDS.collect().get("<unresolved>", ([], 0))[0]
+    with django_assert_num_queries(0):
+        for _ in range(3):
+            middleware(request)
+    counts, _ = REQUEST_SECONDS.collect()["<unresolved>"]
+    assert sum(counts) == sum(before) + 3, (
+        "Убедитесь, что каждый запрос замеряется ровно один раз."
+    )
+
+
+def test_metrics_are_not_public(client, settings):
+    settings.METRICS_TOKEN = "секрет"
+    outside = {"REMOTE_ADDR": "203.0.113.5"}
+    assert client.get("/metrics", **outside).status_code == 404, (
+        "Убедитесь, что метрики не отдаются внешним адресам."
+    )
+    assert client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer неверный", **outside
+    ).status_code == 404
+    assert client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer секрет", **outside
+    ).status_code == 200
+
+
+def test_query_counters_are_thread_safe():
+    sample = RequestSample()
+    inspector = QueryInspector("test:view")
+
+    def execute(sql, params, many, context):
+        pass
+
+    def run(_):
+        for _ in range(5000):
+            sample.execute(execute, "UPDATE t SET a = 1", (), False, {})
+            inspector(execute, "UPDATE t SET a = 1", (), False, {})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(run, range(8)))
+    assert sample.queries == inspector.total == 40000, (
+        "Убедитесь, что запросы из нескольких потоков считаются без"
+        " потерь."
+    )
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from mixer.main import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _walk(client, url, cursor_key):
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url, {"cursor": cursor} if cursor else {})
+        page = response.context["page_obj"]
+        pages.append(page)
+        cursor = getattr(page, cursor_key)
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pagination_walks_all_posts(
+        user_client, many_posts_with_published_locations):
+    posts = many_posts_with_published_locations
+    pages = _walk(user_client, "/", "next_cursor")
+    seen = [post.id for page in pages for post in page]
+    assert sorted(seen) == sorted(post.id for post in posts), (
+        "Убедитесь, что курсорная пагинация показывает каждую публикацию"
+        " ровно один раз."
+    )
+    assert all(len(page) <= N_PER_PAGE for page in pages)
+    assert not pages[0].has_previous()
+
+    last = pages[-1]
+    response = user_client.get("/", {"cursor": last.previous_cursor})
+    assert [post.id for post in response.context["page_obj"]] == [
+        post.id for post in pages[-2]
+    ], "Убедитесь, что ссылка на предыдущую страницу ведёт назад."
+
+
+def test_keyset_pagination_with_equal_pub_dates(
+        mixer: Mixer, user_client, user, published_category):
+    pub_date = timezone.now() - timedelta(days=1)
+    posts = mixer.cycle(N_PER_PAGE * 2 + 3).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=pub_date,
+    )
+    url = f"/category/{published_category.slug}/"
+    pages = _walk(user_client, url, "next_cursor")
+    seen = [post.id for page in pages for post in page]
+    assert len(pages) == 3
+    assert seen == sorted((post.id for post in posts), reverse=True)
+
+
+def test_keyset_pagination_ignores_broken_cursor(
+        user_client, many_posts_with_published_locations):
+    response = user_client.get("/", {"cursor": "not-a-cursor"})
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from blog.models import Comment
+from blog.urls import app_name, urlpatterns
+from core.queries import QueryBudgetExceeded, QueryInspector, fingerprint
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_fingerprint_ignores_literals():
+    assert fingerprint(
+        "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a''b'"
+    ) == fingerprint(
+        "SELECT  *  FROM t WHERE id IN (%s, %s) AND name = %s"
+    ) == "SELECT * FROM t WHERE id IN (...) AND name = ?"
+
+
+def test_inspector_reports_repeated_selects(settings, user, mixer):
+    settings.DUPLICATE_QUERY_LIMIT = 2
+    posts = mixer.cycle(3).blend("blog.Post", author=user)
+    inspector = QueryInspector("test:view")
+    with connection.execute_wrapper(inspector):
+        for post in posts:
+            post.refresh_from_db()
+    problems = inspector.problems()
+    assert len(problems) == 1 and "N+1" in problems[0], (
+        "Убедитесь, что повторяющийся запрос определяется как N+1."
+    )
+
+
+def test_strict_mode_raises_on_budget(settings, user_client):
+    settings.QUERY_BUDGETS = {"blog:index": 0}
+    with pytest.raises(QueryBudgetExceeded):
+        user_client.get("/")
+
+
+@pytest.fixture
+def route_kwargs(user, mixer, published_category, published_location):
+    posts = mixer.cycle(15).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location)
+    comments = mixer.cycle(15).blend(
+        "blog.Comment", post=posts[0], author=user)
+    return {
+        "post_id": posts[0].id,
+        "comment_id": comments[0].id,
+        "category_slug": published_category.slug,
+        "username": user.username,
+    }
+
+
+def test_every_blog_route_fits_query_budget(user_client, route_kwargs):
+    for pattern in urlpatterns:
+        assert isinstance(pattern, URLPattern)
+        kwargs = {
+            name: route_kwargs[name] for name in pattern.pattern.converters}
+        url = reverse(f"{app_name}:{pattern.name}", kwargs=kwargs)
+        # В строгом режиме превышение бюджета или N+1 выбрасывает
+        # QueryBudgetExceeded из middleware.
+        response = user_client.get(url, {"q": "слово"})
+        assert response.status_code < 500, url
+
+
+def test_post_delete_queries_do_not_depend_on_comments(
+        user_client, user, mixer, published_category):
+    def delete_with_comments(number):
+        post = mixer.blend(
+            "blog.Post", author=user, category=published_category)
+        mixer.cycle(number).blend("blog.Comment", post=post, author=user)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(f"/posts/{post.id}/delete/")
+        assert response.status_code == 302
+        return len(context)
+
+    assert delete_with_comments(1) == delete_with_comments(10), (
+        "Убедитесь, что комментарии удаляемой публикации удаляются"
+        " одним запросом, а не по одному."
+    )
+    assert not Comment.objects.exists()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM blog_search")
+        assert cursor.fetchone()[0] == 0, (
+            "Убедитесь, что удалённые комментарии убираются из поискового"
+            " индекса."
+        )
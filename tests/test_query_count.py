@@ -0,0 +1,82 @@
+import warnings
+
+import pytest
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+
+from blog.cache import INDEX_FEED_TAG, feed_page_key, release_scheduled_posts
+
+pytestmark = [pytest.mark.django_db]
+
+# Сессия, пользователь и одна выборка публикаций страницы.
+FEED_QUERIES = 3
+# Для категории и профиля — ещё выборка самой категории или автора.
+FEED_WITH_OWNER_QUERIES = 4
+# Для категории — и проверка её состояния для ETag.
+CATEGORY_FEED_QUERIES = 5
+# Страница ленты из кэша: только сессия и пользователь.
+CACHED_FEED_QUERIES = 2
+# Сессия, пользователь, состояние публикации и авторы комментариев для
+# ETag, публикация со связями и комментарии с авторами.
+DETAIL_QUERIES = 6
+
+
+@pytest.fixture
+def feed_urls(user, published_category):
+    return (
+        ("/", FEED_QUERIES),
+        (f"/category/{published_category.slug}/", CATEGORY_FEED_QUERIES),
+        (f"/profile/{user.username}/", FEED_WITH_OWNER_QUERIES),
+    )
+
+
+def test_feed_query_count_is_fixed(
+        user_client, another_user_client, feed_urls,
+        many_posts_with_published_locations, django_assert_num_queries):
+    for client in (user_client, another_user_client):
+        for url, expected in feed_urls:
+            cache.clear()
+            release_scheduled_posts()
+            with django_assert_num_queries(expected):
+                response = client.get(url)
+            assert response.status_code == 200
+            assert len(response.context["page_obj"]) > 1
+
+
+def test_cached_feed_page_skips_orm(
+        user_client, another_user_client,
+        many_posts_with_published_locations, django_assert_num_queries):
+    user_client.get("/")
+    with django_assert_num_queries(CACHED_FEED_QUERIES):
+        response = another_user_client.get("/")
+    assert len(response.context["page_obj"]) > 1
+
+
+@pytest.mark.parametrize("cursor", (
+    "x" * 300, "курсор с пробелами", "WzEsIFsxXV0", "eyJhIjogMX0"))
+def test_invalid_cursor_uses_first_page_key(
+        user_client, many_posts_with_published_locations,
+        django_assert_num_queries, cursor):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", CacheKeyWarning)
+        response = user_client.get("/", {"cursor": cursor})
+    assert response.status_code == 200
+    feed_keys = [key for key in cache._cache if "feed_page:" in key]
+    assert feed_keys == [cache.make_key(feed_page_key(INDEX_FEED_TAG))], (
+        "Убедитесь, что повреждённый курсор открывает первую страницу и"
+        " не создаёт в кэше отдельную запись."
+    )
+    with django_assert_num_queries(CACHED_FEED_QUERIES):
+        user_client.get("/")
+
+
+def test_post_detail_query_count_does_not_grow_with_comments(
+        another_user_client, mixer, post_with_published_location,
+        django_assert_num_queries):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    for n_comments in (1, 5):
+        mixer.cycle(n_comments).blend("blog.Comment", post=post)
+        with django_assert_num_queries(DETAIL_QUERIES):
+            response = another_user_client.get(url)
+        assert response.status_code == 200
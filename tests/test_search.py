@@ -0,0 +1,68 @@
+import pytest
+
+from core.search import stem, tokenize
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_russian_stemmer_merges_word_forms():
+    assert stem("книгами") == stem("книга") == stem("книги")
+    assert stem("публикации") == stem("публикация")
+    assert tokenize("Ёлки, Python!") == ["елк", "python"]
+
+
+def test_search_finds_word_forms_and_respects_visibility(
+        user_client, mixer, user, published_category):
+    visible = mixer.blend(
+        "blog.Post", title="Прогулка", text="Мы видели красивые горы",
+        author=user, category=published_category)
+    mixer.blend(
+        "blog.Post", title="Горы", text="Скрытая публикация",
+        author=user, category=published_category, is_published=False)
+    by_comment = mixer.blend(
+        "blog.Post", title="Поход", text="Без ключевого слова",
+        author=user, category=published_category)
+    mixer.blend("blog.Comment", post=by_comment, text="Какая гора!")
+
+    response = user_client.get("/search/", {"q": "горой"})
+    found = [post.id for post in response.context["page_obj"]]
+    assert sorted(found) == sorted([visible.id, by_comment.id]), (
+        "Убедитесь, что поиск находит разные формы слова в публикациях и"
+        " комментариях и не показывает скрытые публикации."
+    )
+
+
+def test_search_ranks_title_matches_first(
+        user_client, mixer, user, published_category):
+    in_text = mixer.blend(
+        "blog.Post", title="Заметка", text="Про озеро",
+        author=user, category=published_category)
+    in_title = mixer.blend(
+        "blog.Post", title="Озеро", text="Заметка",
+        author=user, category=published_category)
+    response = user_client.get("/search/", {"q": "озеро"})
+    assert [post.id for post in response.context["page_obj"]] == [
+        in_title.id, in_text.id]
+
+
+def test_search_pages(user_client, mixer, user, published_category):
+    posts = mixer.cycle(12).blend(
+        "blog.Post", title="Море", author=user, category=published_category)
+    # Совпадения в комментариях стоят ниже заголовков и не должны
+    # повторять публикации первой страницы на второй.
+    for post in posts:
+        mixer.blend("blog.Comment", post=post, text="У моря")
+    first = user_client.get("/search/", {"q": "море"}).context["page_obj"]
+    assert len(first) == 10 and first.has_next()
+    second = user_client.get(
+        "/search/", {"q": "море", "cursor": first.next_cursor}
+    ).context["page_obj"]
+    assert len(second) == 2 and not second.has_next()
+    assert not {p.id for p in first} & {p.id for p in second}
+    assert {p.id for p in [*first, *second]} == {p.id for p in posts}
+
+    broken = user_client.get(
+        "/search/", {"q": "море", "cursor": "nan_1"}).context["page_obj"]
+    assert [p.id for p in broken] == [p.id for p in first], (
+        "Убедитесь, что неверный курсор поиска открывает первую страницу."
+    )
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.db import connection
+
+from core.db import apply_sqlite_pragmas
+
+PRINT_SETTINGS = """
+import json
+from django.conf import settings
+print(json.dumps({
+    "debug": settings.DEBUG,
+    "apps": settings.INSTALLED_APPS,
+    "middleware": settings.MIDDLEWARE,
+    "conn_max_age": settings.DATABASES["default"].get("CONN_MAX_AGE", 0),
+    "loaders": settings.TEMPLATES[0]["OPTIONS"].get("loaders"),
+    "pragmas": settings.SQLITE_PRAGMAS,
+    "cache": settings.CACHES["default"]["BACKEND"],
+}))
+"""
+
+
+def run_profile(profile, **environ):
+    env = {**os.environ, "BLOGICUM_ENV": profile,
+           "DJANGO_SETTINGS_MODULE": "blogicum.settings",
+           "DJANGO_SECRET_KEY": "test",
+           "DJANGO_SITE_URL": "https://blogicum.example", **environ}
+    env = {name: value for name, value in env.items() if value is not None}
+    return subprocess.run(
+        [sys.executable, "-c", PRINT_SETTINGS], env=env,
+        cwd=settings.BASE_DIR, capture_output=True, text=True)
+
+
+def load_profile(profile):
+    output = run_profile(profile)
+    output.check_returncode()
+    return json.loads(output.stdout)
+
+
+def test_production_profile():
+    production = load_profile("production")
+    assert not production["debug"]
+    assert "debug_toolbar" not in production["apps"]
+    assert not any("debug_toolbar" in name
+                   for name in production["middleware"]), (
+        "Убедитесь, что в профиле production нет debug_toolbar."
+    )
+    assert production["conn_max_age"] > 0
+    assert production["loaders"][0][0] == (
+        "django.template.loaders.cached.Loader")
+    assert production["pragmas"]["journal_mode"] == "WAL"
+    assert not production["cache"].endswith("LocMemCache"), (
+        "Убедитесь, что в профиле production кэш общий для всех процессов"
+        " сервера."
+    )
+
+
+def test_production_requires_site_url():
+    output = run_profile("production", DJANGO_SITE_URL=None)
+    assert output.returncode and "DJANGO_SITE_URL" in output.stderr, (
+        "Убедитесь, что в профиле production адрес сайта задаётся явно."
+    )
+
+
+def test_development_profile_keeps_debug_toolbar():
+    development = load_profile("development")
+    assert development["debug"]
+    assert "debug_toolbar" in development["apps"]
+
+
+def test_sqlite_pragmas_are_applied(settings, db):
+    settings.SQLITE_PRAGMAS = {"cache_size": -1234}
+    apply_sqlite_pragmas(sender=None, connection=connection)
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA cache_size")
+        assert cursor.fetchone()[0] == -1234
@@ -0,0 +1,120 @@
+import gzip
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog import sitemaps
+from blog.sitemaps import build_sitemap
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def sitemap_root(settings, tmp_path, monkeypatch):
+    settings.SITEMAP_ROOT = tmp_path
+    settings.SITE_URL = "https://blogicum.example"
+    # Маленькие файлы, чтобы проверить деление по диапазонам ключей.
+    monkeypatch.setattr(sitemaps, "SITEMAP_URLS", 2)
+    return tmp_path
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    return [
+        mixer.blend("blog.Post", author=user, category=published_category,
+                    pub_date=timezone.now())
+        for _ in range(5)]
+
+
+def read_urlset(path):
+    with gzip.open(path) as archive:
+        return archive.read().decode()
+
+
+def test_build_sitemap(sitemap_root, posts, mixer, user, published_category):
+    hidden = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False)
+    call_command("build_sitemap")
+    index = (sitemap_root / "sitemap.xml").read_text()
+    files = sorted(path.name for path in sitemap_root.glob("*.xml.gz"))
+    assert files == [
+        "categories-0.xml.gz", "posts-0.xml.gz", "posts-1.xml.gz",
+        "posts-2.xml.gz", "profiles-0.xml.gz",
+    ], "Убедитесь, что адреса делятся на файлы по диапазонам ключей."
+    for name in files:
+        assert f"https://blogicum.example/sitemaps/{name}" in index
+    urls = "".join(
+        read_urlset(sitemap_root / name) for name in files
+        if name.startswith("posts"))
+    for post in posts:
+        assert f"https://blogicum.example/posts/{post.pk}/<" in urls
+    assert f"/posts/{hidden.pk}/<" not in urls, (
+        "Убедитесь, что в карту сайта попадают только видимые публикации."
+    )
+    assert f"/profile/{user.username}/" in read_urlset(
+        sitemap_root / "profiles-0.xml.gz")
+    assert f"/category/{published_category.slug}/" in read_urlset(
+        sitemap_root / "categories-0.xml.gz")
+
+
+def test_incremental_rebuild(sitemap_root, posts, django_assert_num_queries):
+    assert build_sitemap() == (5, 0, 0)
+    # По одному агрегатному запросу на раздел.
+    with django_assert_num_queries(len(sitemaps.SECTIONS)):
+        assert build_sitemap() == (0, 0, 5), (
+            "Убедитесь, что без изменений файлы карты сайта не пишутся"
+            " заново."
+        )
+
+    changed = max(posts, key=lambda post: post.pk)
+    changed.text = "Новый текст"
+    changed.save()
+    assert build_sitemap() == (2, 0, 3), (
+        "Убедитесь, что после изменения публикации заново пишутся только"
+        " её файл и файл профиля автора."
+    )
+
+    chunk = changed.pk // sitemaps.SITEMAP_URLS
+    for post in posts:
+        if post.pk // sitemaps.SITEMAP_URLS == chunk:
+            post.delete()
+    _, removed, _ = build_sitemap()
+    assert removed == 1
+    assert not (sitemap_root / f"posts-{chunk}.xml.gz").exists(), (
+        "Убедитесь, что файл диапазона без публикаций удаляется."
+    )
+    assert f"posts-{chunk}.xml.gz" not in (
+        sitemap_root / "sitemap.xml").read_text()
+
+
+def test_username_change_rebuilds_profile(sitemap_root, posts, user):
+    build_sitemap()
+    user.username = "new-name"
+    user.save()
+    assert build_sitemap() == (1, 0, 4)
+    assert "/profile/new-name/" in read_urlset(
+        sitemap_root / "profiles-0.xml.gz"), (
+        "Убедитесь, что после смены имени пользователя карта сайта"
+        " ссылается на новый адрес профиля."
+    )
+
+
+def test_sitemap_is_served(client, sitemap_root, posts):
+    build_sitemap()
+    index = client.get("/sitemap.xml")
+    assert index.status_code == 200
+    assert index["Content-Type"].startswith("application/xml")
+    assert b"<sitemapindex" in b"".join(index.streaming_content)
+    response = client.get("/sitemaps/posts-0.xml.gz")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/gzip"
+    assert not response.has_header("Content-Encoding")
+    assert b"<urlset" in gzip.decompress(
+        b"".join(response.streaming_content))
+    assert client.get(
+        "/sitemap.xml", HTTP_IF_MODIFIED_SINCE=index["Last-Modified"]
+    ).status_code == 304
+    assert client.get("/sitemaps/manifest.json").status_code == 404
+    assert client.get("/sitemaps/missing-0.xml.gz").status_code == 404
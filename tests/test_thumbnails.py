@@ -0,0 +1,120 @@
+from io import BytesIO
+
+import pytest
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog import thumbnails as thumbnails_module
+from blog.models import Post
+from blog.thumbnails import (
+    existing_thumbnails, generate_thumbnails, image_storage, is_complete,
+    thumbnail_dir)
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def image_file(size, mode="RGB", image_format="JPEG", name="photo.jpg"):
+    output = BytesIO()
+    Image.new(mode, size, color="teal").save(output, format=image_format)
+    return ImageFile(output, name=name)
+
+
+@pytest.fixture
+def post_with_large_image(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=image_file((1000, 500)))
+
+
+def test_thumbnails_are_generated_on_save(post_with_large_image):
+    thumbnails = existing_thumbnails(post_with_large_image.image.name)
+    assert is_complete(thumbnails)
+    assert [width for width, _ in thumbnails["webp"]] == [320, 640, 1000], (
+        "Убедитесь, что копии не шире оригинала."
+    )
+    with Image.open(
+            post_with_large_image.image.storage.open(
+                thumbnails["jpg"][0][1])) as thumbnail:
+        assert thumbnail.size == (320, 160)
+    assert generate_thumbnails(post_with_large_image.image.name) == 0
+
+
+def test_transparent_image_thumbnails(media_root):
+    storage = Post._meta.get_field("image").storage
+    name = storage.save(
+        "post_images/logo.png",
+        image_file((200, 100), "RGBA", "PNG", "logo.png"))
+    assert generate_thumbnails(name) == 2
+    assert is_complete(existing_thumbnails(name))
+
+
+def test_post_page_uses_srcset(user_client, post_with_large_image):
+    content = user_client.get(
+        f"/posts/{post_with_large_image.pk}/").content.decode()
+    assert 'type="image/webp"' in content
+    assert "640.jpg 640w" in content, (
+        "Убедитесь, что на странице публикации выводятся уменьшенные копии"
+        " изображения."
+    )
+
+
+def test_missing_thumbnails_are_generated_lazily(
+        user_client, post_with_large_image, media_root):
+    directory = media_root / thumbnail_dir(post_with_large_image.image.name)
+    for path in directory.iterdir():
+        path.unlink()
+    # Удаление копий мимо приложения видно после вытеснения списка из
+    # кэша.
+    cache.clear()
+    user_client.get(f"/posts/{post_with_large_image.pk}/")
+    assert is_complete(existing_thumbnails(post_with_large_image.image.name)), (
+        "Убедитесь, что недостающие копии создаются при показе публикации."
+    )
+
+
+def test_generate_thumbnails_command(post_with_large_image, media_root):
+    directory = media_root / thumbnail_dir(post_with_large_image.image.name)
+    (directory / "640.webp").unlink()
+    call_command("generate_thumbnails", workers=2)
+    assert (directory / "640.webp").exists()
+
+
+def test_post_page_does_not_list_thumbnails(
+        user_client, post_with_large_image, monkeypatch):
+    url = f"/posts/{post_with_large_image.pk}/"
+    user_client.get(url)
+
+    def listdir(path):
+        raise AssertionError(path)
+
+    monkeypatch.setattr(image_storage(), "listdir", listdir)
+    assert "640.jpg 640w" in user_client.get(url).content.decode(), (
+        "Убедитесь, что список копий изображения берётся из кэша, а не из"
+        " каталога копий."
+    )
+
+
+def test_broken_image_is_not_requeued(
+        user_client, mixer, user, published_category, monkeypatch):
+    queued = []
+    monkeypatch.setattr(thumbnails_module, "work_queue", type(
+        "Queue", (), {"submit": lambda self, *job: queued.append(job)})())
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=ImageFile(BytesIO(b"not an image"), name="broken.jpg"))
+    thumbnails_module.generate_batch([post.image.name])
+    queued.clear()
+    for _ in range(2):
+        user_client.get(f"/posts/{post.pk}/")
+    assert not queued, (
+        "Убедитесь, что изображение, копии которого не удалось создать,"
+        " не ставится в очередь при каждом показе."
+    )
@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from blog.models import Category, Comment, Post
+from blog.moderation import set_published
+
+pytestmark = [pytest.mark.django_db]
+
+LONG_AGO = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def test_updated_at_changes_on_save(post_with_published_location):
+    post = post_with_published_location
+    assert post.updated_at >= post.created_at
+    Post.objects.filter(pk=post.pk).update(updated_at=LONG_AGO)
+    post.refresh_from_db()
+    post.title = "Новый заголовок"
+    post.save()
+    post.refresh_from_db()
+    assert post.updated_at > LONG_AGO, (
+        "Убедитесь, что updated_at обновляется при сохранении объекта."
+    )
+
+
+def test_set_published_updates_timestamp(mixer):
+    mixer.cycle(2).blend("blog.Category", is_published=True)
+    Category.objects.update(updated_at=LONG_AGO)
+    set_published(Category.objects.all(), False)
+    assert not Category.objects.filter(updated_at__lte=LONG_AGO).exists(), (
+        "Убедитесь, что массовая смена публикации обновляет updated_at."
+    )
+
+
+def test_comment_edit_changes_post_etag(
+        user, user_client, mixer, post_with_published_location):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    Comment.objects.filter(pk=comment.pk).update(updated_at=LONG_AGO)
+    url = f"/posts/{post.id}/"
+    etag = user_client.get(url)["ETag"]
+    user_client.post(
+        f"/posts/{post.id}/edit_comment/{comment.id}/",
+        {"text": "Исправленный комментарий"})
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что правка комментария меняет ETag публикации."
+    )
+    assert "Исправленный комментарий" in response.content.decode()
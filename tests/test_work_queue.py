@@ -0,0 +1,35 @@
+import operator
+
+import pytest
+from django.test import override_settings
+
+from blog.models import Post
+from blog.signals import apply_comment_counts
+from core.work_queue import WorkQueue
+
+
+@pytest.mark.django_db(transaction=True)
+def test_work_queue_coalesces_effects_by_key():
+    batches = []
+    queue = WorkQueue(batch_delay=0.5)
+    with override_settings(WORK_QUEUE_EAGER=False):
+        for value in (1, 2, 3):
+            queue.submit(batches.append, "post:1", value, operator.add)
+        queue.submit(batches.append, "post:2", -1, operator.add)
+    queue._executor.shutdown(wait=True)
+    assert batches == [{"post:1": 6, "post:2": -1}], (
+        "Убедитесь, что эффекты с одинаковым ключом объединяются в пачку."
+    )
+
+
+@pytest.mark.django_db
+def test_comment_counts_are_applied_in_one_batch(
+        mixer, post_with_published_location, django_assert_num_queries):
+    post = post_with_published_location
+    with django_assert_num_queries(1):
+        apply_comment_counts({post.pk: 3})
+    post.refresh_from_db()
+    assert post.comment_count == 3
+    apply_comment_counts({post.pk: -5})
+    post.refresh_from_db()
+    assert post.comment_count == 0